@@ -1,61 +1,372 @@
 """
 autocorrector
 -----
-A module to autocorrect words in a given wolof text file and writes the corrected text to a new file
+A module to autocorrect words in a given wolof text file and writes the corrected text to a new file.
+It is a command line wrapper around utils.spellchecker.SpellChecker.
+The text is streamed line by line, so memory stays flat whatever the size of the input.
+Lines can be corrected in parallel by a pool of worker processes.
+With --cache-db, the suggestions are also kept from run to run in a SQLite database (utils.suggestion_cache).
+With --build-snapshot, it writes the memory-mapped snapshot of the lexicon index (utils.lexicon_snapshot) instead.
+With --serve, it runs the local HTTP/JSON correction service of utils.server instead, which can pick up lexicon
+edits and delta files without a restart (--hot-reload, utils.lexicon_reloader).
+Contents:
+    parallel_correct_lines,
+    batch_correct_lines,
+    read_lines,
+    write_lines,
+    main
 """
 
+import argparse
+import gc
+import io
+import multiprocessing
 import os
 import sys
-from utils.detection import Detector
-from utils.weighted_levenshtein import Corrector
-from utils.helper import fr_en_word
-import re
-
-
-detection = Detector()
-correction = Corrector()
-
-filepath = sys.argv[1]
-
-# get the directory and filename from the input filepath
-directory = os.path.dirname(filepath)
-filename = os.path.splitext(os.path.basename(filepath))[0]
-
-# read the text from the input file
-with open(filepath, "r", encoding="utf-8") as f:
-    text = f.read()
-
-# split the text into lines
-lines = text.split("\n")
-
-# correct the text line by line
-corrected_lines = []
-for line in lines:
-    # split the line into words and punctuation
-    words = re.findall(r"[\w']+|[^\w\s]", line)
-    corrected_words = []
-    for word in words:
-        # ignore punctuation
-        if not re.match(r"[\w']+|[^\w\s]", word):
-            continue
-        # process words
-        if not fr_en_word(word) and not detection.checker(word):
-            suggestions = correction.get_suggestions(word)
-            if suggestions:
-                corrected_word = suggestions[0][0]
-                corrected_words.append(corrected_word)
-            else:
-                corrected_words.append(word)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.cache import CacheStats
+from utils.lexicon import Lexicon, lex_filepath, load_lexicon
+from utils.lexicon_reloader import RELOAD_INTERVAL, LexiconReloader
+from utils.lexicon_snapshot import is_snapshot, write_snapshot
+from utils.spellchecker import SpellChecker, TOKEN_CACHE_SIZE
+from utils.suggestion_cache import SUGGESTION_CACHE_SIZE, SuggestionCache, lexicon_version
+from utils.weighted_levenshtein import ENGINES
+
+WRITE_BUFFER_SIZE = 1 << 16
+CHUNK_SIZE = 256
+
+# spell checker of the worker processes
+_worker_spellchecker: Optional[SpellChecker] = None
+
+
+def _open_suggestion_cache(cache_db: Optional[str], lexicon_filepath: str,
+                           max_entries: int) -> Optional[SuggestionCache]:
+    if cache_db is None:
+        return None
+    return SuggestionCache(cache_db, lexicon_version(load_lexicon(lexicon_filepath)), max_entries)
+
+
+def _init_worker(lexicon_filepath: str, cache_size: int, cache_db: Optional[str] = None,
+                 cache_db_size: int = SUGGESTION_CACHE_SIZE, segment: bool = False, engine: str = 'dp') -> None:
+    """
+        Create the spell checker of a worker process. Forked workers inherit the lexicon index already built by the
+        parent process, so this does not read nor index the lexicon again
+    """
+
+    global _worker_spellchecker
+    _worker_spellchecker = SpellChecker(lexicon_filepath, cache_size=cache_size,
+                                        suggestion_cache=_open_suggestion_cache(cache_db, lexicon_filepath,
+                                                                                cache_db_size),
+                                        segment=segment, engine=engine)
+
+
+def _correct_chunk(chunk: List[str]) -> Tuple[List[str], int, CacheStats, Optional[CacheStats]]:
+    corrected_chunk = _worker_spellchecker.correct_batch(chunk)
+    suggestion_cache = _worker_spellchecker.suggestion_cache
+    return (corrected_chunk, os.getpid(), _worker_spellchecker.cache_stats,
+            suggestion_cache.stats if suggestion_cache is not None else None)
+
+
+def parallel_correct_lines(lines: Iterable[str], workers: int, chunk_size: int = CHUNK_SIZE,
+                           lexicon_filepath: str = lex_filepath, cache_size: int = TOKEN_CACHE_SIZE,
+                           cache_stats: Optional[Dict[int, CacheStats]] = None, cache_db: Optional[str] = None,
+                           cache_db_size: int = SUGGESTION_CACHE_SIZE,
+                           suggestion_cache_stats: Optional[Dict[int, CacheStats]] = None,
+                           segment: bool = False, engine: str = 'dp') -> Iterator[str]:
+    """
+        Lazily correct a stream of lines with a pool of worker processes, keeping the order of the lines.
+        Lines are sent to the workers by chunks and at most 2 chunks per worker are in flight, so memory stays flat.
+        The lexicon index must be built (e.g. by creating a SpellChecker) before calling this function so that
+        forked workers inherit it copy-on-write
+        Parameters
+        ----------
+            lines: Iterable[str]
+                The lines to correct, with their line endings
+            workers: int
+                The number of worker processes
+            chunk_size: int
+                The number of lines sent at once to a worker
+            lexicon_filepath: str
+                Path of the lexicon file
+            cache_size: int
+                The size of the token cache of each worker
+            cache_stats: Optional[Dict[int, CacheStats]]
+                Filled with the statistics of the token cache of each worker, by process id
+            cache_db: Optional[str]
+                Path of the persistent suggestion cache shared by the workers, if any
+            cache_db_size: int
+                The maximum number of entries of the persistent suggestion cache
+            suggestion_cache_stats: Optional[Dict[int, CacheStats]]
+                Filled with the statistics of the persistent suggestion cache of each worker, by process id
+            segment: bool
+                Split the misspelled words written together, see SpellChecker
+            engine: str
+                The search engine of the corrector, see Corrector.get_suggestions
+        Returns
+        ----------
+            corrected_lines: Iterator[str]
+                The corrected lines, with their line endings
+    """
+
+    frozen = "fork" in multiprocessing.get_all_start_methods()
+    if frozen:
+        context = multiprocessing.get_context("fork")
+        # keep the objects of the parent process out of the garbage collector while the workers run, its passes
+        # would otherwise write to (and copy) the pages shared with the workers
+        gc.freeze()
+    else:
+        context = multiprocessing.get_context()
+
+    def collect(future) -> List[str]:
+        corrected_chunk, pid, stats, suggestion_stats = future.result()
+        if cache_stats is not None:
+            cache_stats[pid] = stats
+        if suggestion_cache_stats is not None and suggestion_stats is not None:
+            suggestion_cache_stats[pid] = suggestion_stats
+        return corrected_chunk
+
+    lines = iter(lines)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(lexicon_filepath, cache_size, cache_db, cache_db_size, segment,
+                                           engine)) as executor:
+            pending = deque()
+            while True:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_correct_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from collect(pending.popleft())
+            while pending:
+                yield from collect(pending.popleft())
+    finally:
+        # the pool is shut down, the objects of this process are collected again
+        if frozen:
+            gc.unfreeze()
+
+
+def batch_correct_lines(spellchecker: SpellChecker, lines: Iterable[str],
+                        chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+        Lazily correct a stream of lines in the current process by chunks, so that the suggestions of each chunk
+        are read from (and written to) the persistent suggestion cache at once
+        Parameters
+        ----------
+            spellchecker: SpellChecker
+                The spell checker correcting the lines
+            lines: Iterable[str]
+                The lines to correct, with their line endings
+            chunk_size: int
+                The number of lines corrected at once
+        Returns
+        ----------
+            corrected_lines: Iterator[str]
+                The corrected lines, with their line endings
+    """
+
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        yield from spellchecker.correct_batch(chunk)
+
+
+def read_lines(filepath: str) -> Iterator[str]:
+    """
+        Lazily read the lines of a text file, or of the standard input if filepath is "-"
+        Parameters
+        ----------
+            filepath: str
+                Path of the input file
+        Returns
+        ----------
+            lines: Iterator[str]
+                The lines of the file, with their line endings untranslated ("\r\n" stays "\r\n")
+    """
+
+    if filepath == "-":
+        # decoded as UTF-8 whatever the locale, with the line endings kept like for a file
+        stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        try:
+            yield from stdin
+        finally:
+            # leaves sys.stdin.buffer open
+            stdin.detach()
+        return
+
+    # newline="" keeps the line endings, so that the lines without corrections are written back unchanged
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        yield from f
+
+
+def write_lines(lines: Iterable[str], output_filepath: str) -> None:
+    """
+        Write a stream of lines to a file, or to the standard output if output_filepath is "-".
+        A file is written to a temporary file in the same directory which atomically replaces the output file
+        once every line is written, so readers never see a partially corrected file.
+        The standard output is written in UTF-8 with the line endings kept. It is flushed after each line when it
+        is a terminal, so that results appear as soon as they are computed, and buffered otherwise
+        Parameters
+        ----------
+            lines: Iterable[str]
+                The lines to write, with their line endings
+            output_filepath: str
+                Path of the output file
+    """
+
+    if output_filepath == "-":
+        sys.stdout.flush()
+        interactive = sys.stdout.isatty()
+        stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+        try:
+            for line in lines:
+                stdout.write(line)
+                if interactive:
+                    stdout.flush()
+        finally:
+            stdout.flush()
+            # leaves sys.stdout.buffer open
+            stdout.detach()
+        return
+
+    directory, filename = os.path.split(os.path.abspath(output_filepath))
+    temporary_filepath = os.path.join(directory, ".{}.{}.tmp".format(filename, os.getpid()))
+    # created like a regular file (0o666 minus the umask), unlike tempfile.mkstemp which restricts it to 0o600
+    fd = os.open(temporary_filepath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER_SIZE) as f:
+            for line in lines:
+                f.write(line)
+        os.replace(temporary_filepath, output_filepath)
+    except BaseException:
+        os.remove(temporary_filepath)
+        raise
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Autocorrect the words of a wolof text file")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="input file, one sentence per line (default: standard input)")
+    parser.add_argument("-o", "--output",
+                        help="output file, '-' for the standard output "
+                             "(default: <input>_corrected.txt, or the standard output when reading the standard input)")
+    parser.add_argument("--lexicon", default=lex_filepath,
+                        help="lexicon file, one word per line, or a snapshot built with --build-snapshot "
+                             "(default: the wolof lexicon of the package)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes correcting the lines (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="number of lines sent at once to a worker process (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=TOKEN_CACHE_SIZE,
+                        help="number of distinct tokens whose correction is cached, per worker (default: %(default)s)")
+    parser.add_argument("--cache-db",
+                        help="SQLite database keeping the suggestions from run to run, emptied when the lexicon "
+                             "changes (default: no persistent cache)")
+    parser.add_argument("--cache-db-size", type=int, default=SUGGESTION_CACHE_SIZE,
+                        help="maximum number of entries of the --cache-db database (default: %(default)s)")
+    parser.add_argument("--engine", choices=ENGINES, default="dp",
+                        help="search engine of the suggestions, they all return the same suggestions; 'symspell' "
+                             "indexes the deletes of the lexicon words, faster but larger in memory "
+                             "(default: %(default)s)")
+    parser.add_argument("--segment", action="store_true",
+                        help="split the misspelled words written together (e.g. 'dajaleak' -> 'dajale ak'). Some "
+                             "misspellings of single words are split as well")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the hit/miss/eviction counters of the token and suggestion caches to the "
+                             "standard error")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the HTTP/JSON correction service instead of correcting a file")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address the correction service listens on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="port the correction service listens on (default: %(default)s)")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="let the correction service apply the changes of the lexicon file and of --lexicon-delta "
+                             "without a restart")
+    parser.add_argument("--lexicon-delta",
+                        help="file of lexicon changes applied by --hot-reload, one '+word' or '-word' per line")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="seconds between two checks of the lexicon files by --hot-reload (default: %(default)s)")
+    parser.add_argument("--build-snapshot", metavar="PATH",
+                        help="write the binary snapshot of the index of --lexicon to PATH and exit. Snapshots are "
+                             "memory-mapped instead of parsed and indexed at startup")
+    args = parser.parse_args(argv)
+
+    if args.build_snapshot is not None:
+        if is_snapshot(args.lexicon):
+            parser.error("--lexicon must be a text lexicon to build a snapshot")
+        write_snapshot(Lexicon.from_file(args.lexicon, compact=True).dictionary, args.build_snapshot)
+        return
+
+    if args.serve:
+        # imported here so that correcting files does not load asyncio
+        from utils.server import serve
+        # a single worker process gains nothing over the background thread of the server
+        suggestion_cache = _open_suggestion_cache(args.cache_db, args.lexicon, args.cache_db_size)
+        spellchecker = SpellChecker(args.lexicon, cache_size=args.cache_size, suggestion_cache=suggestion_cache,
+                                    segment=args.segment, engine=args.engine)
+        reloader = None
+        if args.hot_reload or args.lexicon_delta is not None:
+            reloader = LexiconReloader(spellchecker, args.lexicon, args.lexicon_delta, args.reload_interval)
+            # applied now rather than by the first batch of every worker
+            reloader.poll()
+        serve(spellchecker, args.host, args.port, args.workers if args.workers > 1 else 0, reloader)
+        return
+
+    filepath = args.input
+    output_filepath = args.output
+    if output_filepath is None:
+        if filepath == "-":
+            output_filepath = "-"
+        else:
+            # get the directory and filename from the input filepath
+            directory = os.path.dirname(filepath)
+            filename = os.path.splitext(os.path.basename(filepath))[0]
+            output_filepath = os.path.join(directory, f"{filename}_corrected.txt")
+
+    worker_stats, worker_suggestion_stats = {}, {}
+
+    if args.workers > 1:
+        # the workers open the suggestion cache themselves
+        spellchecker = SpellChecker(args.lexicon, cache_size=args.cache_size, segment=args.segment,
+                                    engine=args.engine)
+        if args.engine == 'symspell':
+            # built before the workers are forked, so that they share it
+            spellchecker.corrector.symspell_index
+        corrected_lines = parallel_correct_lines(read_lines(filepath), args.workers, args.chunk_size,
+                                                 args.lexicon, args.cache_size, worker_stats, args.cache_db,
+                                                 args.cache_db_size, worker_suggestion_stats, args.segment,
+                                                 args.engine)
+    else:
+        suggestion_cache = _open_suggestion_cache(args.cache_db, args.lexicon, args.cache_db_size)
+        spellchecker = SpellChecker(args.lexicon, cache_size=args.cache_size, suggestion_cache=suggestion_cache,
+                                    segment=args.segment, engine=args.engine)
+        if suggestion_cache is not None and filepath != "-":
+            corrected_lines = batch_correct_lines(spellchecker, read_lines(filepath), args.chunk_size)
         else:
-            corrected_words.append(word)
-    # join the corrected words and punctuation to form the corrected line
-    corrected_line = " ".join(corrected_words)
-    corrected_lines.append(corrected_line)
-
-# join the corrected lines with newline characters
-corrected_text = "\n".join(corrected_lines)
-
-# write the corrected text to a new file
-output_filepath = os.path.join(directory, f"{filename}_corrected.txt")
-with open(output_filepath, "w") as f:
-    f.write(corrected_text)
+            # the standard input is corrected line by line so that results appear as soon as possible
+            corrected_lines = spellchecker.correct_lines(read_lines(filepath))
+
+    try:
+        write_lines(corrected_lines, output_filepath)
+    finally:
+        if spellchecker.suggestion_cache is not None:
+            spellchecker.suggestion_cache.close()
+
+    if args.stats:
+        stats = sum(worker_stats.values(), spellchecker.cache_stats)
+        print("token cache: {}".format(stats), file=sys.stderr)
+        if args.cache_db is not None:
+            suggestion_stats = worker_suggestion_stats.values()
+            if spellchecker.suggestion_cache is not None:
+                suggestion_stats = [spellchecker.suggestion_cache.stats]
+            print("suggestion cache: {}".format(sum(suggestion_stats, CacheStats())), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
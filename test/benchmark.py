@@ -0,0 +1,409 @@
+"""
+benchmark
+-----
+Performance benchmarks of the spell checker, saved to and compared against a JSON baseline.
+Each benchmark reports its throughput (operations per second) and the p50/p90/p99 latencies of one operation.
+Queries are the words of test/misspelled_wolof_words.txt and synthetic misspellings of lexicon words.
+Usage (from the root of the repository):
+    PYTHONPATH=. python test/benchmark.py --save       # measure and store the baseline
+    PYTHONPATH=. python test/benchmark.py --compare    # measure and fail if slower than the baseline
+Contents:
+    percentile,
+    measure,
+    synthetic_misspellings,
+    synthetic_corpus,
+    BENCHMARKS,
+    run_benchmarks,
+    compare,
+    main
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import autocorrector
+from utils.detection import Detector
+from utils.lexicon import Lexicon, lex_filepath, load_lexicon
+from utils.naive_levenshtein import get_count, get_probs, get_vocab, get_suggestions as naive_get_suggestions
+from utils.prefilter import PrefilterIndex
+from utils.segmentation import Segmenter
+from utils.spellchecker import SpellChecker
+from utils.weighted_levenshtein import Corrector
+from utils.wolof_rules import WOLOF_LETTERS, compound_sound_transformation, rules_validator
+
+TEST_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'misspelled_wolof_words.txt')
+BASELINE_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+        Nearest-rank percentile of a list of values
+        Parameters
+        ----------
+            values: Sequence[float]
+                The measured values
+            q: float
+                The percentile, between 0 and 100
+        Returns
+        ----------
+            value: float
+                The smallest value greater than or equal to q% of the values
+    """
+
+    ordered = sorted(values)
+    rank = max(int(len(ordered) * q / 100 + 0.5), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(operation: Callable, inputs: Sequence, repeat: int = 1, warmup: int = 3) -> Dict[str, float]:
+    """
+        Time each call of an operation on each input
+        Parameters
+        ----------
+            operation: Callable
+                The operation to measure, called with one input
+            inputs: Sequence
+                The inputs of the operation
+            repeat: int
+                The number of passes over the inputs
+            warmup: int
+                The number of unmeasured calls made first
+        Returns
+        ----------
+            result: Dict[str, float]
+                The number of operations, their throughput and latency percentiles (microseconds)
+    """
+
+    for item in inputs[:warmup]:
+        operation(item)
+
+    timer = time.perf_counter
+    latencies = []
+    start = timer()
+    for _ in range(repeat):
+        for item in inputs:
+            begin = timer()
+            operation(item)
+            latencies.append(timer() - begin)
+    elapsed = timer() - start
+
+    return {'ops': len(latencies), 'ops_per_sec': len(latencies) / elapsed,
+            'p50_us': percentile(latencies, 50) * 1e6, 'p90_us': percentile(latencies, 90) * 1e6,
+            'p99_us': percentile(latencies, 99) * 1e6}
+
+
+def synthetic_misspellings(words: Sequence[str], n: int, rng: random.Random) -> List[str]:
+    """
+        Misspell random words with one or two random deletions, insertions or substitutions of wolof letters
+    """
+
+    misspellings = []
+    for _ in range(n):
+        word = list(rng.choice(words))
+        for _ in range(rng.randint(1, 2)):
+            position = rng.randrange(len(word) + 1)
+            edit = rng.choice(('delete', 'insert', 'replace'))
+            if edit == 'insert' or len(word) < 2:
+                word.insert(position, rng.choice(WOLOF_LETTERS))
+            elif edit == 'delete':
+                del word[min(position, len(word) - 1)]
+            else:
+                word[min(position, len(word) - 1)] = rng.choice(WOLOF_LETTERS)
+        misspellings.append(''.join(word))
+    return misspellings
+
+
+def synthetic_corpus(valid_words: Sequence[str], misspelled_words: Sequence[str], n_lines: int,
+                     rng: random.Random, error_rate: float = 0.2) -> List[str]:
+    """
+        Lines of 5 to 15 words, each word being misspelled with probability `error_rate`
+    """
+
+    lines = []
+    for _ in range(n_lines):
+        words = [rng.choice(misspelled_words) if rng.random() < error_rate else rng.choice(valid_words)
+                 for _ in range(rng.randint(5, 15))]
+        lines.append(' '.join(words) + '\n')
+    return lines
+
+
+class _Data(object):
+    """
+        The inputs shared by the benchmarks
+    """
+
+    def __init__(self, sample: int, seed: int) -> None:
+        rng = random.Random(seed)
+        self.valid_words, self.test_misspellings = [], []
+        with open(TEST_FILEPATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                right, wrongs = line.split(':')
+                self.valid_words.append(right.strip())
+                self.test_misspellings.extend(wrongs.split())
+        self.lexicon_words = [word for word, _ in load_lexicon().dictionary.iter_entries()]
+        self.all_words = self.valid_words + self.test_misspellings
+        self.queries = (rng.sample(self.test_misspellings, sample // 2) +
+                        synthetic_misspellings(self.lexicon_words, sample - sample // 2, rng))
+        self.corpus = synthetic_corpus(self.lexicon_words, self.queries, 4 * sample, rng)
+
+
+def _bench_checker(data: _Data, repeat: int) -> Dict[str, float]:
+    return measure(Detector().checker, data.all_words, repeat)
+
+
+def _bench_is_word(membership: str) -> Callable[[_Data, int], Dict[str, float]]:
+    def bench(data: _Data, repeat: int) -> Dict[str, float]:
+        detector = Detector(load_lexicon(membership=membership))
+        return measure(detector.is_word, data.all_words, repeat)
+    return bench
+
+
+def _bench_suggestions(max_distance: int, engine: str = 'dp') -> Callable[[_Data, int], Dict[str, float]]:
+    def bench(data: _Data, repeat: int) -> Dict[str, float]:
+        corrector = Corrector()
+        return measure(lambda word: corrector.get_suggestions(word, max_distance, engine=engine), data.queries,
+                       repeat)
+    return bench
+
+
+def _bench_suggestions_many(max_distance: int) -> Callable[[_Data, int], Dict[str, float]]:
+    def bench(data: _Data, repeat: int) -> Dict[str, float]:
+        corrector = Corrector()
+        # one batch of all the queries, an operation being one word of the batch
+        batch = measure(lambda words: corrector.get_suggestions_many(words, max_distance), [data.queries] * repeat,
+                        warmup=0)
+        n_words = len(data.queries)
+        return {'ops': n_words * batch['ops'], 'ops_per_sec': n_words * batch['ops_per_sec'],
+                'p50_us': None, 'p90_us': None, 'p99_us': None}
+    return bench
+
+
+def _bench_suggestions_top1(data: _Data, repeat: int) -> Dict[str, float]:
+    corrector = Corrector()
+    return measure(lambda word: corrector.get_suggestions(word, 5, top_n=1), data.queries, repeat)
+
+
+def _bench_naive_suggestions(data: _Data, repeat: int) -> Dict[str, float]:
+    vocab = get_vocab(data.lexicon_words)
+    probs = get_probs(get_count(data.lexicon_words))
+    return measure(lambda word: naive_get_suggestions(word, probs, vocab), data.queries, repeat)
+
+
+def _bench_segment(data: _Data, repeat: int) -> Dict[str, float]:
+    # tokens of two lexicon words written together
+    rng = random.Random(0)
+    words = [word for word in data.lexicon_words if len(word) >= 2]
+    tokens = [rng.choice(words) + rng.choice(words) for _ in range(len(data.queries))]
+    return measure(Segmenter().segment, tokens, repeat)
+
+
+def _bench_sound_transformation(data: _Data, repeat: int) -> Dict[str, float]:
+    # the undecorated function, so that the memoization does not turn the benchmark into cache lookups
+    return measure(compound_sound_transformation.__wrapped__, data.all_words, repeat)
+
+
+def _bench_rules_validator(data: _Data, repeat: int) -> Dict[str, float]:
+    return measure(rules_validator, data.all_words, repeat)
+
+
+def _bench_index_build(compact: bool) -> Callable[[_Data, int], Dict[str, float]]:
+    def bench(data: _Data, repeat: int) -> Dict[str, float]:
+        return measure(lambda filepath: Lexicon.from_file(filepath, compact), [lex_filepath] * 3, repeat, warmup=0)
+    return bench
+
+
+def _bench_prefilter_build(data: _Data, repeat: int) -> Dict[str, float]:
+    lexicon = load_lexicon()
+    return measure(PrefilterIndex, [lexicon] * 3, repeat, warmup=0)
+
+
+def _bench_autocorrector(data: _Data, repeat: int) -> Dict[str, float]:
+    """
+        End-to-end autocorrector runs on the synthetic corpus, an operation being one line
+    """
+
+    directory = tempfile.mkdtemp()
+    input_filepath = os.path.join(directory, 'corpus.txt')
+    output_filepath = os.path.join(directory, 'corpus_corrected.txt')
+    with open(input_filepath, 'w', encoding='utf-8') as f:
+        f.writelines(data.corpus)
+
+    try:
+        run = measure(lambda _: autocorrector.main([input_filepath, '-o', output_filepath]), [None] * repeat,
+                      warmup=0)
+    finally:
+        for filepath in (input_filepath, output_filepath):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        os.rmdir(directory)
+
+    # lines are not timed one by one, see correct_line for their latencies
+    n_lines = len(data.corpus)
+    return {'ops': n_lines * run['ops'], 'ops_per_sec': n_lines * run['ops_per_sec'],
+            'p50_us': None, 'p90_us': None, 'p99_us': None}
+
+
+def _bench_correct_line(data: _Data, repeat: int) -> Dict[str, float]:
+    # a fresh token cache, shared by the lines of the corpus like in a run of the autocorrector
+    return measure(SpellChecker().correct_line, [line.rstrip('\n') for line in data.corpus], repeat)
+
+
+BENCHMARKS = {
+    'checker': _bench_checker,
+    'is_word_set': _bench_is_word('set'),
+    'is_word_bloom': _bench_is_word('bloom'),
+    'is_word_trie': _bench_is_word('trie'),
+    'get_suggestions_d1': _bench_suggestions(1),
+    'get_suggestions_d2': _bench_suggestions(2),
+    'get_suggestions_d3': _bench_suggestions(3),
+    'get_suggestions_d5': _bench_suggestions(5),
+    'get_suggestions_automaton_d1': _bench_suggestions(1, 'automaton'),
+    'get_suggestions_automaton_d2': _bench_suggestions(2, 'automaton'),
+    'get_suggestions_automaton_d3': _bench_suggestions(3, 'automaton'),
+    'get_suggestions_automaton_d5': _bench_suggestions(5, 'automaton'),
+    'get_suggestions_scan_d1': _bench_suggestions(1, 'scan'),
+    'get_suggestions_scan_d2': _bench_suggestions(2, 'scan'),
+    'get_suggestions_scan_d3': _bench_suggestions(3, 'scan'),
+    'get_suggestions_scan_d5': _bench_suggestions(5, 'scan'),
+    'get_suggestions_symspell_d1': _bench_suggestions(1, 'symspell'),
+    'get_suggestions_symspell_d2': _bench_suggestions(2, 'symspell'),
+    'get_suggestions_top1': _bench_suggestions_top1,
+    'get_suggestions_many_d2': _bench_suggestions_many(2),
+    'get_suggestions_many_d5': _bench_suggestions_many(5),
+    'naive_get_suggestions': _bench_naive_suggestions,
+    'segment': _bench_segment,
+    'compound_sound_transformation': _bench_sound_transformation,
+    'rules_validator': _bench_rules_validator,
+    'index_build': _bench_index_build(False),
+    'index_build_compact': _bench_index_build(True),
+    'prefilter_index_build': _bench_prefilter_build,
+    'correct_line': _bench_correct_line,
+    'autocorrector_lines': _bench_autocorrector,
+}
+
+
+def run_benchmarks(names: Sequence[str], sample: int = 200, repeat: int = 1, seed: int = 0,
+                   verbose: bool = True) -> Dict[str, Dict[str, float]]:
+    """
+        Run benchmarks by name
+        Parameters
+        ----------
+            names: Sequence[str]
+                The names of the benchmarks, keys of BENCHMARKS
+            sample: int
+                The number of misspelled words used as suggestion queries
+            repeat: int
+                The number of passes over the inputs of each benchmark
+            seed: int
+                Seed of the synthetic queries and corpus
+            verbose: bool
+                Print each result once measured
+        Returns
+        ----------
+            results: Dict[str, Dict[str, float]]
+                The measures of each benchmark
+    """
+
+    data = _Data(sample, seed)
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](data, repeat)
+        if verbose:
+            latencies = ['{:>10}'.format('-') if results[name][key] is None else '{:>10.1f}'.format(results[name][key])
+                         for key in ('p50_us', 'p90_us', 'p99_us')]
+            print('{:<30} {:>12.1f} ops/s  p50 {} us  p90 {} us  p99 {} us'.format(
+                name, results[name]['ops_per_sec'], *latencies))
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = 0.25) -> List[str]:
+    """
+        Compare results with a baseline
+        Parameters
+        ----------
+            results: Dict[str, Dict[str, float]]
+                The measures of each benchmark
+            baseline: Dict[str, Dict[str, float]]
+                The measures of the baseline
+            tolerance: float
+                The relative slowdown allowed before a benchmark is reported as a regression
+        Returns
+        ----------
+            regressions: List[str]
+                A description of each benchmark slower than its baseline
+    """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print('{:<30} not in the baseline'.format(name))
+            continue
+        ratio = result['ops_per_sec'] / baseline[name]['ops_per_sec']
+        print('{:<30} {:>7.2f}x baseline throughput'.format(name, ratio))
+        if ratio < 1 - tolerance:
+            regressions.append('{}: {:.1f} ops/s, baseline {:.1f} ops/s ({:.0%} slower)'.format(
+                name, result['ops_per_sec'], baseline[name]['ops_per_sec'], 1 - ratio))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the spell checker')
+    parser.add_argument('--only', help='comma separated benchmarks to run (default: all), among ' +
+                                       ', '.join(BENCHMARKS))
+    parser.add_argument('--sample', type=int, default=200,
+                        help='number of misspelled words used as queries (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=1, help='passes over the inputs (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data (default: %(default)s)')
+    parser.add_argument('--save', nargs='?', const=BASELINE_FILEPATH,
+                        help='save the results as the baseline (default path: %(const)s)')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILEPATH,
+                        help='compare the results with a baseline and exit with status 1 on a regression '
+                             '(default path: %(const)s)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown tolerated by --compare (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    # language identification warns about every word it cannot identify
+    logging.getLogger('polyglot').setLevel(logging.ERROR)
+
+    if args.compare and args.compare != args.save and not os.path.exists(args.compare):
+        parser.error('no baseline at {}, run with --save first'.format(args.compare))
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown benchmarks: {}'.format(', '.join(unknown)))
+
+    results = run_benchmarks(names, args.sample, args.repeat, args.seed)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                                   'processor': platform.processor(), 'cpus': os.cpu_count()},
+                       'settings': {'sample': args.sample, 'repeat': args.repeat, 'seed': args.seed},
+                       'results': results}, f, indent=2)
+        print('baseline saved to {}'.format(args.save))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print('PERFORMANCE REGRESSION', *regressions, sep='\n  ', file=sys.stderr)
+            return 1
+        print('no regression')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
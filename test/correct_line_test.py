@@ -0,0 +1,122 @@
+"""
+correct_line_test
+-----
+Check that SpellChecker.correct_line only replaces the misspelled words of a line: clean lines are returned as they
+are (the same string), and the line endings, the spacing, the punctuation and the quotes around the words are kept.
+The misspelled parts of hyphenated compounds are corrected one by one, keeping the hyphens
+Usage (from the root of the repository):
+    PYTHONPATH=. python test/correct_line_test.py
+Contents:
+    check_clean_lines,
+    check_line_endings,
+    check_quotes,
+    check_compounds,
+    check_batch,
+    main
+"""
+
+import sys
+from typing import List, Tuple
+from utils.spellchecker import SpellChecker
+
+CLEAN_LINES = ('dajale ak njaxlaf', 'dajale ak njaxlaf\n', 'dajale ak njaxlaf\r\n',
+               '  dajale,  ak   njaxlaf !\r\n', '"dajale" ak \'njaxlaf\'', '')
+# the line, its expected correction
+LINE_ENDINGS = (('dajale ak ndiakhlaf', 'dajale ak njaxlaf'),
+                ('dajale ak ndiakhlaf\n', 'dajale ak njaxlaf\n'),
+                ('dajale ak ndiakhlaf\r\n', 'dajale ak njaxlaf\r\n'),
+                ('miskite!\r\n', 'miskit!\r\n'))
+QUOTED_LINES = (('"\'dajale\' ak"', '"\'dajale\' ak"'),
+                ('"dadiale" ak', '"dajale" ak'),
+                ("'ndiakhlaf' ak", "'njaxlaf' ak"),
+                ('« dadiale », ak', '« dajale », ak'))
+COMPOUNDS = (('xam-xam-bi', 'xam-xam-bi'),
+             ('ndiakhlaf-bi', 'njaxlaf-bi'),
+             ('dadiale-bi ak xam-xam-bi\r\n', 'dajale-bi ak xam-xam-bi\r\n'))
+
+
+def _check_corrections(spellchecker: SpellChecker, cases: Tuple[Tuple[str, str], ...]) -> List[str]:
+    errors = []
+    for line, expected_line in cases:
+        corrected_line = spellchecker.correct_line(line)
+        if corrected_line != expected_line:
+            errors.append('{!r} is corrected into {!r} instead of {!r}'.format(line, corrected_line, expected_line))
+    return errors
+
+
+def check_clean_lines(spellchecker: SpellChecker) -> List[str]:
+    """
+        Correct lines without misspelled words
+        Parameters
+        ----------
+            spellchecker: SpellChecker
+                The spell checker correcting the lines
+        Returns
+        ----------
+            errors: List[str]
+                The failed checks
+    """
+
+    errors = []
+    for line in CLEAN_LINES:
+        corrected_line = spellchecker.correct_line(line)
+        if corrected_line != line:
+            errors.append('{!r} is corrected into {!r}'.format(line, corrected_line))
+        elif corrected_line is not line:
+            errors.append('{!r} is copied instead of being returned as it is'.format(line))
+    return errors
+
+
+def check_line_endings(spellchecker: SpellChecker) -> List[str]:
+    """
+        Correct lines ending with "\\n", "\\r\\n" or without line ending
+    """
+
+    return _check_corrections(spellchecker, LINE_ENDINGS)
+
+
+def check_quotes(spellchecker: SpellChecker) -> List[str]:
+    """
+        Correct lines with quoted words, the quotes must stay outside of the replaced words
+    """
+
+    return _check_corrections(spellchecker, QUOTED_LINES)
+
+
+def check_compounds(spellchecker: SpellChecker) -> List[str]:
+    """
+        Correct lines with hyphenated compounds, their misspelled parts are corrected and their hyphens kept
+    """
+
+    return _check_corrections(spellchecker, COMPOUNDS)
+
+
+def check_batch(spellchecker: SpellChecker) -> List[str]:
+    """
+        Correct all the lines at once with correct_batch and correct_lines, which must agree with correct_line
+    """
+
+    errors = []
+    lines = list(CLEAN_LINES) + [line for cases in (LINE_ENDINGS, QUOTED_LINES, COMPOUNDS) for line, _ in cases]
+    expected_lines = [spellchecker.correct_line(line) for line in lines]
+    if spellchecker.correct_batch(lines) != expected_lines:
+        errors.append('correct_batch differs from correct_line')
+    if list(spellchecker.correct_lines(lines)) != expected_lines:
+        errors.append('correct_lines differs from correct_line')
+    return errors
+
+
+def main() -> int:
+    spellchecker = SpellChecker()
+    failures = 0
+    for check in (check_clean_lines, check_line_endings, check_quotes, check_compounds, check_batch):
+        errors = check(spellchecker)
+        print('{:<20} {}'.format(check.__name__, 'OK' if not errors else 'FAILED'))
+        for error in errors:
+            print('    {}'.format(error))
+        failures += bool(errors)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
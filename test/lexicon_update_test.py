@@ -0,0 +1,180 @@
+"""
+lexicon_update_test
+-----
+Check the incremental lexicon updates (Lexicon.updated, Dictionary.updated, CompactDictionary.updated) and the hot
+reload of a SpellChecker (utils.lexicon_reloader), for every membership structure of the lexicon, with and without
+the compact trie. A copy of the wolof lexicon is edited and a delta file is applied: the index in use before the
+reload must be left unchanged, and the reloaded index must hold the same entries as an index built from scratch.
+The snapshot of the lexicon (utils.lexicon_snapshot) is updated in memory with the same changes
+Usage (from the root of the repository):
+    PYTHONPATH=. python test/lexicon_update_test.py
+Contents:
+    check_update,
+    check_snapshot_update,
+    main
+"""
+
+import os
+import sys
+import tempfile
+from typing import List, Tuple
+from utils.lexicon import MEMBERSHIPS, Lexicon, lex_filepath, lexicon_entry
+from utils.lexicon_reloader import LexiconReloader
+from utils.lexicon_snapshot import write_snapshot
+from utils.spellchecker import SpellChecker
+from utils.weighted_levenshtein import Corrector
+
+# removed from the lexicon file, removed by the delta file, added to the lexicon file, added by the delta file
+FILE_REMOVED_WORD = 'njaxlaf'
+DELTA_REMOVED_WORD = 'dajale'
+FILE_ADDED_WORD = 'ndawkat-bees'
+DELTA_ADDED_WORD = 'dajaleekat'
+WORDS = (FILE_REMOVED_WORD, DELTA_REMOVED_WORD, FILE_ADDED_WORD, DELTA_ADDED_WORD)
+
+
+def _write_files(directory: str) -> Tuple[str, str]:
+    with open(lex_filepath, 'r', encoding='utf-8') as f:
+        words = f.read().split()
+    lexicon_filepath = os.path.join(directory, 'lexicon.txt')
+    with open(lexicon_filepath, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words))
+    delta_filepath = os.path.join(directory, 'lexicon_delta.txt')
+    with open(delta_filepath, 'w', encoding='utf-8') as f:
+        f.write('# applied on top of the lexicon file\n+{}\n-{}\n'.format(DELTA_ADDED_WORD, DELTA_REMOVED_WORD))
+    return lexicon_filepath, delta_filepath
+
+
+def _edit_lexicon_file(lexicon_filepath: str) -> None:
+    with open(lexicon_filepath, 'r', encoding='utf-8') as f:
+        words = [word for word in f.read().split() if word != FILE_REMOVED_WORD]
+    words.append(FILE_ADDED_WORD)
+    with open(lexicon_filepath, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words))
+
+
+def _expected_entries(lexicon_filepath: str) -> List[Tuple[str, str]]:
+    with open(lexicon_filepath, 'r', encoding='utf-8') as f:
+        entries = [lexicon_entry(word) for word in f.read().split()]
+    entries = [entry for entry in entries if entry != lexicon_entry(DELTA_REMOVED_WORD)]
+    entries.append(lexicon_entry(DELTA_ADDED_WORD))
+    return sorted(entries)
+
+
+def _state(lexicon: Lexicon) -> Tuple[List[Tuple[str, str]], List[bool], int]:
+    """
+        The entries of a lexicon, the membership of the changed words and the size
+    """
+
+    memberships = [lexicon.contains(lexicon_entry(word)[0]) for word in WORDS]
+    return sorted(lexicon.dictionary.iter_entries()), memberships, len(lexicon)
+
+
+def _check_updated_lexicon(lexicon: Lexicon, expected_entries: List[Tuple[str, str]]) -> List[str]:
+    errors = []
+    entries, memberships, size = _state(lexicon)
+    if entries != expected_entries:
+        errors.append('the updated index differs from an index built from scratch')
+    if memberships != [False, False, True, True]:
+        errors.append('membership of {} in the updated index: {}'.format(', '.join(WORDS), memberships))
+    if size != len(expected_entries):
+        errors.append('size of the updated index: {} instead of {}'.format(size, len(expected_entries)))
+    corrector = Corrector(lexicon)
+    for word in (FILE_ADDED_WORD, DELTA_ADDED_WORD):
+        if corrector.get_suggestions(word, 1, top_n=1) != [(word, 0)]:
+            errors.append('{} is not suggested by the updated index'.format(word))
+    return errors
+
+
+def check_update(membership: str, compact: bool) -> List[str]:
+    """
+        Hot reload an edited lexicon file and a delta file into a SpellChecker
+        Parameters
+        ----------
+            membership: str
+                The membership structure of the lexicon, see utils.lexicon.MEMBERSHIPS
+            compact: bool
+                Index the lexicon in a CompactDictionary
+        Returns
+        ----------
+            errors: List[str]
+                The failed checks
+    """
+
+    errors = []
+    with tempfile.TemporaryDirectory() as directory:
+        lexicon_filepath, delta_filepath = _write_files(directory)
+        lexicon = Lexicon.from_file(lexicon_filepath, compact=compact, membership=membership)
+        spellchecker = SpellChecker(lexicon=lexicon)
+        before = _state(lexicon)
+        if before[1] != [True, True, False, False]:
+            errors.append('membership of {} in the initial index: {}'.format(', '.join(WORDS), before[1]))
+
+        reloader = LexiconReloader(spellchecker, lexicon_filepath, delta_filepath)
+        _edit_lexicon_file(lexicon_filepath)
+        if not reloader.reload():
+            errors.append('the changes were not applied')
+        updated_lexicon = spellchecker.lexicon
+        if updated_lexicon is lexicon:
+            errors.append('the index was not swapped')
+        if _state(lexicon) != before:
+            errors.append('the index in use before the reload was modified')
+
+        errors.extend(_check_updated_lexicon(updated_lexicon, _expected_entries(lexicon_filepath)))
+        if not spellchecker.check(DELTA_ADDED_WORD) or spellchecker.correct_word(DELTA_ADDED_WORD) != DELTA_ADDED_WORD:
+            errors.append('the spell checker does not know {} after the reload'.format(DELTA_ADDED_WORD))
+        if reloader.reload():
+            errors.append('applying the same changes again changed the index')
+    return errors
+
+
+def check_snapshot_update(membership: str) -> List[str]:
+    """
+        Update a lexicon opened from a snapshot with the changes of the edited lexicon and delta files
+        Parameters
+        ----------
+            membership: str
+                The membership structure of the lexicon, see utils.lexicon.MEMBERSHIPS
+        Returns
+        ----------
+            errors: List[str]
+                The failed checks
+    """
+
+    errors = []
+    with tempfile.TemporaryDirectory() as directory:
+        lexicon_filepath, _ = _write_files(directory)
+        snapshot_filepath = os.path.join(directory, 'lexicon.idx')
+        write_snapshot(Lexicon.from_file(lexicon_filepath, compact=True).dictionary, snapshot_filepath)
+        lexicon = Lexicon.from_snapshot(snapshot_filepath, membership=membership)
+        before = _state(lexicon)
+        if before[1] != [True, True, False, False]:
+            errors.append('membership of {} in the initial index: {}'.format(', '.join(WORDS), before[1]))
+
+        _edit_lexicon_file(lexicon_filepath)
+        added = [lexicon_entry(FILE_ADDED_WORD), lexicon_entry(DELTA_ADDED_WORD)]
+        removed = [lexicon_entry(FILE_REMOVED_WORD), lexicon_entry(DELTA_REMOVED_WORD)]
+        updated_lexicon = lexicon.updated(added, removed)
+        if _state(lexicon) != before:
+            errors.append('the snapshot index was modified')
+        errors.extend(_check_updated_lexicon(updated_lexicon, _expected_entries(lexicon_filepath)))
+    return errors
+
+
+def main() -> int:
+    failures = 0
+    cases = [('{} {}'.format(membership, 'compact' if compact else 'dictionary'),
+              lambda membership=membership, compact=compact: check_update(membership, compact))
+             for compact in (False, True) for membership in MEMBERSHIPS]
+    cases.extend(('{} snapshot'.format(membership), lambda membership=membership: check_snapshot_update(membership))
+                 for membership in MEMBERSHIPS)
+    for name, check in cases:
+        errors = check()
+        print('{:<20} {}'.format(name, 'OK' if not errors else 'FAILED'))
+        for error in errors:
+            print('    {}'.format(error))
+        failures += bool(errors)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
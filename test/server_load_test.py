@@ -0,0 +1,107 @@
+"""
+server_load_test
+-----
+A local load test of the correction service of utils.server: concurrent keep-alive clients send requests built
+from the misspelled words of the test set and the throughput and latency percentiles of each endpoint are reported
+Contents:
+    run_client,
+    load_test,
+    main
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+from benchmark import percentile
+from utils.server import CorrectionServer
+
+
+async def run_client(port: int, requests: List[Tuple[str, dict]], latencies: Dict[str, List[float]]) -> None:
+    """
+        Send requests one after the other on a keep-alive connection, recording their latencies by endpoint
+    """
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for path, payload in requests:
+            body = json.dumps(payload).encode('utf-8')
+            start = time.perf_counter()
+            writer.write('POST {} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                         'Content-Length: {}\r\n\r\n'.format(path, len(body)).encode('latin-1') + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b'\r\n', b''):
+                    break
+                name, _, value = header_line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies[path].append(time.perf_counter() - start)
+            if not status_line.startswith(b'HTTP/1.1 200'):
+                raise RuntimeError('{} failed: {}'.format(path, status_line.decode('latin-1').strip()))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def load_test(words: List[str], clients: int, requests_per_client: int, workers: int) -> None:
+    """
+        Start a server on a free local port and run the clients against it
+    """
+
+    server = CorrectionServer(port=0, workers=workers)
+    await server.start()
+    rng = random.Random(0)
+    latencies = {'/check': [], '/suggest': [], '/correct': []}
+    plans = []
+    for _ in range(clients):
+        plan = []
+        for _ in range(requests_per_client):
+            path = rng.choice(list(latencies))
+            sample = rng.sample(words, 5)
+            if path == '/correct':
+                payload = {'text': ' '.join(sample)}
+            else:
+                payload = {'words': sample, 'top_n': 3} if path == '/suggest' else {'words': sample}
+            plan.append((path, payload))
+        plans.append(plan)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(server.port, plan, latencies) for plan in plans))
+    elapsed = time.perf_counter() - start
+    stats = server.stats
+    await server.stop()
+
+    total = sum(len(values) for values in latencies.values())
+    print('{} requests from {} clients in {:.2f}s: {:.1f} requests/s, mean batch size {:.2f}'.format(
+        total, clients, elapsed, total / elapsed, stats['mean_batch_size']))
+    for path, values in latencies.items():
+        if values:
+            print('{:<9} {:>5} requests  p50 {:7.1f} ms  p99 {:7.1f} ms'.format(
+                path, len(values), percentile(values, 50) * 1000, percentile(values, 99) * 1000))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test the local correction service')
+    parser.add_argument('--clients', type=int, default=16, help='number of concurrent clients (default: %(default)s)')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='number of requests sent by each client (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='number of worker processes of the server, 0 for a thread (default: %(default)s)')
+    args = parser.parse_args()
+
+    words = []
+    with open('test/misspelled_wolof_words.txt', 'r', encoding='utf-8') as f:
+        for line in f:
+            words.extend(line.split(':')[1].split())
+    asyncio.run(load_test(words, args.clients, args.requests, args.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+snapshot_startup_test
+-----
+Measure the startup time and memory of a process opening the lexicon index from the text lexicon or from its
+memory-mapped snapshot (utils.lexicon_snapshot), for the wolof lexicon and a synthetic lexicon of random words.
+Every measure runs in a fresh process: the time and resident memory (RSS) of load_lexicon plus a first lookup
+are reported, with the proportional set size (PSS) which splits the shared pages of a snapshot between the
+processes mapping it
+Contents:
+    synthetic_lexicon,
+    measure_startup,
+    main
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from utils.lexicon import Lexicon, lex_filepath
+from utils.lexicon_snapshot import write_snapshot
+from utils.wolof_rules import WOLOF_LETTERS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run in the measured process: the imports are done before the clock starts
+_PROBE = """
+import json, sys, time
+from utils.lexicon import load_lexicon
+
+def memory():
+    values = {}
+    for filepath, names in (('/proc/self/status', ('VmRSS',)), ('/proc/self/smaps_rollup', ('Pss',))):
+        try:
+            with open(filepath) as f:
+                for line in f:
+                    name, _, value = line.partition(':')
+                    if name in names:
+                        values[name] = int(value.split()[0]) / 1024
+        except OSError:
+            pass
+    return values
+
+before = memory()
+start = time.perf_counter()
+lexicon = load_lexicon(sys.argv[1], compact=sys.argv[2] == 'compact')
+lexicon.contains('dajale')
+elapsed = time.perf_counter() - start
+after = memory()
+print(json.dumps({'seconds': elapsed, 'rss_mb': after.get('VmRSS', 0) - before.get('VmRSS', 0),
+                  'pss_mb': after.get('Pss', 0) - before.get('Pss', 0)}))
+"""
+
+
+def synthetic_lexicon(filepath: str, n_words: int, seed: int = 0) -> None:
+    """
+        Write a lexicon of distinct random words of wolof letters, 3 to 12 letters long
+        Parameters
+        ----------
+            filepath: str
+                Path of the lexicon file
+            n_words: int
+                The number of words
+            seed: int
+                The seed of the random generator
+    """
+
+    rng = random.Random(seed)
+    letters = WOLOF_LETTERS
+    words = set()
+    while len(words) < n_words:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 12))))
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sorted(words)))
+
+
+def measure_startup(filepath: str, mode: str = 'default', repeat: int = 3) -> Dict[str, float]:
+    """
+        Open a lexicon in fresh processes and keep the fastest run
+        Parameters
+        ----------
+            filepath: str
+                Path of the text lexicon or of the snapshot
+            mode: str
+                'compact' to index a text lexicon in a CompactDictionary
+            repeat: int
+                The number of processes started
+        Returns
+        ----------
+            result: Dict[str, float]
+                The seconds, RSS and PSS (MB) of the fastest run
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE, filepath, mode], env=env, check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Startup time and memory of the text lexicon and of its snapshot')
+    parser.add_argument('--words', type=int, default=1000000,
+                        help='number of words of the synthetic lexicon, 0 to skip it (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='processes started per measure (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        lexicons = [('wolof', lex_filepath)]
+        if args.words:
+            synthetic_filepath = os.path.join(directory, 'synthetic.txt')
+            synthetic_lexicon(synthetic_filepath, args.words)
+            lexicons.append(('synthetic {}'.format(args.words), synthetic_filepath))
+
+        for name, filepath in lexicons:
+            snapshot_filepath = os.path.join(directory, os.path.basename(filepath) + '.idx')
+            start = time.perf_counter()
+            size = write_snapshot(Lexicon.from_file(filepath, compact=True).dictionary, snapshot_filepath)
+            elapsed = time.perf_counter() - start
+            print('{}: snapshot of {:.1f} MB built in {:.2f} s'.format(name, size / 2 ** 20, elapsed))
+            for label, path, mode in (('text', filepath, 'default'), ('text compact', filepath, 'compact'),
+                                      ('snapshot', snapshot_filepath, 'default')):
+                result = measure_startup(path, mode, args.repeat)
+                print('    {:<14} {:10.1f} ms   RSS {:8.1f} MB   PSS {:8.1f} MB'.format(
+                    label, 1000 * result['seconds'], result['rss_mb'], result['pss_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -296,7 +296,7 @@ def suggestion_adequacy(test_set, verbose: bool = False):
     start = time.time()
 
     for right, wrong in dataset:
-        suggestions = suggester.get_suggestions(wrong)
+        suggestions = suggester.get_suggestions(wrong, top_n=1)
         if suggestions:
             suggestion = suggestions[0][0]
             good += (suggestion == right)
@@ -408,7 +408,7 @@ def error_stats(test_set):
     corrector = Corrector()
 
     for right, wrong in data:
-        if corrector.get_suggestions(wrong)[0][0] != right:
+        if corrector.get_suggestions(wrong, top_n=1)[0][0] != right:
             error[wrong] = dynamic_levenshtein(wrong, right)
 
     print(Counter(error.values()))
@@ -4,34 +4,37 @@ base
 The base class for all the spelling correction and word suggestion algorithms
 Contents:
     Base class,
-    insert_word
+    insert_word,
+    remove_word
 """
 
-from typing import List
-from utils.dictionary import Dictionary
+from typing import List, Optional
 from utils.helper import word_preprocessing
-
-WOLOF_LETTERS = 'aàãbcdeéëfgijklmnñŋoópqrstuwxy'
-WOLOF_VOWELS = 'aàãioóueéë'
-lex_filepath = 'utils/wolof_lexicon.txt'
+from utils.lexicon import Lexicon, load_lexicon, lex_filepath
+from utils.wolof_rules import WOLOF_LETTERS, WOLOF_VOWELS
 
 
 class Base(object):
 
-    def __init__(self) -> None:
+    def __init__(self, lexicon: Optional[Lexicon] = None) -> None:
+        """
+            Parameters
+            ----------
+                lexicon: Optional[Lexicon]
+                    The lexicon index to use. Defaults to the shared index of the wolof lexicon,
+                    which is built once per process
+        """
 
         self.alphabet = WOLOF_LETTERS
         self.vowels = WOLOF_VOWELS
-        self.dictionary = Dictionary()
-
-        vocab_file = open(lex_filepath, 'r').read().split()
-
-        for word in vocab_file:
-            self.insert_word([word_preprocessing(word).strip()])
+        self.lexicon = lexicon if lexicon is not None else load_lexicon(lex_filepath)
+        self.dictionary = self.lexicon.dictionary
+        self._owns_lexicon = False
 
     def insert_word(self, words: List[str]) -> None:
         """
-            Function that add words (index) to the dictionary used by the algorithm
+            Function that add words (index) to the dictionary used by the algorithm.
+            The shared lexicon index is copied on the first insertion so that other instances are not affected
             Parameters
             ----------
                 words : List[str]
@@ -39,5 +42,29 @@ class Base(object):
         """
 
         processed_actual_words = [(word_preprocessing(word), word) for word in words]
+        self._own_lexicon()
+        self.lexicon.insert_word(processed_actual_words)
+
+    def remove_word(self, words: List[str]) -> int:
+        """
+            Function that removes words from the dictionary used by the algorithm, pruning the trie nodes left empty.
+            The shared lexicon index is copied on the first modification so that other instances are not affected
+            Parameters
+            ----------
+                words : List[str]
+                    The list of words to be removed
+            Returns
+            ----------
+                removed: int
+                    The number of indexed words removed
+        """
+
+        processed_actual_words = [(word_preprocessing(word), word) for word in words]
+        self._own_lexicon()
+        return self.lexicon.remove_word(processed_actual_words)
 
-        self.dictionary.insert_word(processed_actual_words)
+    def _own_lexicon(self) -> None:
+        if not self._owns_lexicon:
+            self.lexicon = self.lexicon.copy()
+            self.dictionary = self.lexicon.dictionary
+            self._owns_lexicon = True
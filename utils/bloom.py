@@ -0,0 +1,85 @@
+"""
+bloom
+-----
+A Bloom filter: a compact probabilistic set answering membership queries without storing the words.
+A word which was added is always found, a word which was not added is found with probability `error_rate`.
+Positions are derived from a single blake2b digest per word by double hashing
+Contents:
+    BloomFilter class,
+    add,
+    __contains__
+"""
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter(object):
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4) -> None:
+        """
+            Parameters
+            ----------
+                capacity: int
+                    The number of words the filter is sized for
+                error_rate: float
+                    The false positive probability once `capacity` words are added
+        """
+
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bit_count = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.bit_count / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.size = 0
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], error_rate: float = 1e-4) -> 'BloomFilter':
+        """
+            Build a filter sized for the given words and add them
+            Parameters
+            ----------
+                words: Iterable[str]
+                    The words of the filter
+                error_rate: float
+                    The false positive probability
+            Returns
+            ----------
+                bloom_filter: BloomFilter
+                    The filter containing the words
+        """
+
+        words = set(words)
+        bloom_filter = cls(len(words), error_rate)
+        for word in words:
+            bloom_filter.add(word)
+        return bloom_filter
+
+    def _positions(self, word: str) -> Iterable[int]:
+        digest = hashlib.blake2b(word.encode('utf-8'), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        # an odd step never cycles early when the number of bits is a power of two
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+        bit_count = self.bit_count
+        return ((first_hash + i * second_hash) % bit_count for i in range(self.hash_count))
+
+    def add(self, word: str) -> None:
+        bits = self.bits
+        for position in self._positions(word):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.size += 1
+
+    def __contains__(self, word: str) -> bool:
+        bits = self.bits
+        for position in self._positions(word):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.size
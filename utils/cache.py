@@ -0,0 +1,119 @@
+"""
+cache
+-----
+A bounded least-recently-used cache counting its hits, misses and evictions
+Contents:
+    CacheStats class,
+    LRUCache class
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CacheStats(object):
+
+    def __init__(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __add__(self, other: 'CacheStats') -> 'CacheStats':
+        return CacheStats(self.hits + other.hits, self.misses + other.misses, self.evictions + other.evictions)
+
+    def __repr__(self) -> str:
+        return 'CacheStats(hits={}, misses={}, evictions={}, hit_rate={:.2%})'.format(
+            self.hits, self.misses, self.evictions, self.hit_rate)
+
+
+class LRUCache(object):
+
+    def __init__(self, maxsize: int = 1 << 16) -> None:
+        """
+            Parameters
+            ----------
+                maxsize: int
+                    Maximum number of entries, the least recently used entry is evicted when it is exceeded.
+                    A cache of size 0 stores nothing
+        """
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[Hashable], Any]) -> Any:
+        """
+            Get the value of a key, computing and storing it on a miss
+            Parameters
+            ----------
+                key: Hashable
+                    The key to look for
+                compute: Callable[[Hashable], Any]
+                    Function computing the value of the key
+            Returns
+            ----------
+                value: Any
+                    The cached or computed value
+        """
+
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+
+        # computed outside of the lock, concurrent misses on the same key may compute it twice
+        value = compute(key)
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+            Store the value of a key, evicting the least recently used entry if the cache is full
+            Parameters
+            ----------
+                key: Hashable
+                    The key to store
+                value: Any
+                    Its value
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
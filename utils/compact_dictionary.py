@@ -0,0 +1,290 @@
+"""
+compact_dictionary
+-----
+An array-backed Trie dictionary storing the nodes of the index in flat integer arrays instead of one
+Python object per node. It exposes the same insert_word and traversal methods as the Dictionary class.
+Nodes are integers, edges are labelled with integer letter codes (the position of the letter in
+WOLOF_LETTERS, other letters get the next free codes) and are stored in compressed sparse row layout:
+the edges of node n are edge_label[edge_start[n]:edge_start[n + 1]] and edge_target[...].
+The actual words are concatenated in a single string, the words of node n are the slices
+word_offsets[word_start[n]:word_start[n + 1] + 1] of word_blob.
+Contents:
+    CompactDictionary class,
+    insert_word,
+    remove_word,
+    updated,
+    child,
+    edges,
+    words,
+    lookup,
+    iter_entries
+"""
+
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+from utils.wolof_rules import WOLOF_LETTERS
+
+
+class CompactDictionary(object):
+
+    def __init__(self, alphabet: str = WOLOF_LETTERS) -> None:
+        self.letters = alphabet
+        self.codes = {letter: code for code, letter in enumerate(alphabet)}
+        # only the root node, without any edge nor word
+        self.edge_start = array('I', [0, 0])
+        self.edge_label = array('H')
+        self.edge_target = array('I')
+        self.word_start = array('I', [0, 0])
+        self.word_offsets = array('I', [0])
+        self.word_blob = ''
+
+    @property
+    def node_count(self) -> int:
+        return len(self.edge_start) - 1
+
+    @property
+    def root(self) -> int:
+        return 0
+
+    def insert_word(self, words: List[Tuple[str, str]]) -> None:
+        """
+            Add words to index to the Trie dictionary.
+            The arrays are rebuilt on each call, so words should be inserted in bulk
+        Parameters
+        ----------
+            words: List[Tuple[str, str]]
+                The list of words to index to the dictionary
+        """
+
+        if not words:
+            return
+
+        entries = list(self.iter_entries())
+        entries.extend(words)
+        self._build(entries)
+
+    def remove_word(self, words: List[Tuple[str, str]]) -> int:
+        """
+            Remove indexed words from the Trie dictionary.
+            The arrays are rebuilt without them, so the nodes left without words nor children disappear
+        Parameters
+        ----------
+            words: List[Tuple[str, str]]
+                The list of (processed word, actual word) entries to remove, every occurrence of an actual word
+                indexed under its processed word is removed
+        Returns
+        ----------
+            removed: int
+                The number of entries removed
+        """
+
+        removed_words = set(words)
+        if not removed_words:
+            return 0
+
+        entries = [entry for entry in self.iter_entries() if entry not in removed_words]
+        removed = self.word_start[-1] - len(entries)
+        if removed:
+            self._build(entries)
+        return removed
+
+    def updated(self, added: List[Tuple[str, str]], removed: List[Tuple[str, str]]) -> 'CompactDictionary':
+        """
+            Build a new Trie dictionary with some words removed then some words added, leaving this one unchanged.
+            The flat arrays cannot share nodes, so the new dictionary is built from all the entries
+        Parameters
+        ----------
+            added: List[Tuple[str, str]]
+                The (processed word, actual word) entries to index
+            removed: List[Tuple[str, str]]
+                The entries to remove, as in remove_word
+        Returns
+        ----------
+            dictionary: CompactDictionary
+                The updated dictionary
+        """
+
+        removed_words = set(removed)
+        entries = [entry for entry in self.iter_entries() if entry not in removed_words]
+        entries.extend(added)
+        dictionary = CompactDictionary(self.letters)
+        dictionary._build(entries)
+        return dictionary
+
+    def _code(self, letter: str) -> int:
+        code = self.codes.get(letter)
+        if code is None:
+            code = len(self.letters)
+            self.letters += letter
+            self.codes[letter] = code
+        return code
+
+    def _build(self, entries: List[Tuple[str, str]]) -> None:
+        """
+            Build the arrays from (processed word, actual word) entries.
+            Nodes are numbered in creation order, so the children of a node are sorted by their number
+            in the same order as the keys of Dictionary.children
+        """
+
+        transitions = {}
+        parents = array('I', [0])
+        labels = array('H', [0])
+        node_words = {}
+        codes = self.codes
+
+        for processed_word, actual_word in entries:
+            node = 0
+            for letter in processed_word:
+                code = codes.get(letter)
+                if code is None:
+                    code = self._code(letter)
+                key = node << 16 | code
+                child = transitions.get(key)
+                if child is None:
+                    child = len(parents)
+                    transitions[key] = child
+                    parents.append(node)
+                    labels.append(code)
+                node = child
+            if node in node_words:
+                node_words[node].append(actual_word)
+            else:
+                node_words[node] = [actual_word]
+
+        del transitions
+        node_count = len(parents)
+
+        # count the children of every node then place every edge at its parent's next free slot
+        edge_start = array('I', bytes(4 * (node_count + 1)))
+        for child in range(1, node_count):
+            edge_start[parents[child] + 1] += 1
+        for node in range(node_count):
+            edge_start[node + 1] += edge_start[node]
+
+        edge_label = array('H', bytes(2 * (node_count - 1)))
+        edge_target = array('I', bytes(4 * (node_count - 1)))
+        next_slot = array('I', edge_start[:-1])
+        for child in range(1, node_count):
+            slot = next_slot[parents[child]]
+            edge_label[slot] = labels[child]
+            edge_target[slot] = child
+            next_slot[parents[child]] = slot + 1
+
+        word_start = array('I', [0])
+        word_offsets = array('I', [0])
+        blob = []
+        offset = 0
+        for node in range(node_count):
+            for actual_word in node_words.get(node, ()):
+                blob.append(actual_word)
+                offset += len(actual_word)
+                word_offsets.append(offset)
+            word_start.append(len(word_offsets) - 1)
+
+        self.edge_start = edge_start
+        self.edge_label = edge_label
+        self.edge_target = edge_target
+        self.word_start = word_start
+        self.word_offsets = word_offsets
+        self.word_blob = ''.join(blob)
+
+    def child(self, node: int, letter: str) -> Optional[int]:
+        """
+            Get the child of a node reached with a given letter
+        Parameters
+        ----------
+            node: int
+                The node handle
+            letter: str
+                The letter of the edge to follow
+        Returns
+        ----------
+            child: Optional[int]
+                The child node handle or None if there is no such edge
+        """
+
+        code = self.codes.get(letter)
+        if code is None:
+            return None
+        edge_label = self.edge_label
+        for i in range(self.edge_start[node], self.edge_start[node + 1]):
+            if edge_label[i] == code:
+                return self.edge_target[i]
+        return None
+
+    def edges(self, node: int) -> Iterable[Tuple[str, int]]:
+        """
+            Get the (letter, child) pairs of a node in insertion order
+        Parameters
+        ----------
+            node: int
+                The node handle
+        Returns
+        ----------
+            edges: Iterable[Tuple[str, int]]
+                The letters and child node handles
+        """
+
+        start, end = self.edge_start[node], self.edge_start[node + 1]
+        letters = self.letters
+        return [(letters[self.edge_label[i]], self.edge_target[i]) for i in range(start, end)]
+
+    def words(self, node: int) -> Optional[List[str]]:
+        """
+            Get the words indexed at a node
+        Parameters
+        ----------
+            node: int
+                The node handle
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words ending at this node or None if no word ends here
+        """
+
+        start, end = self.word_start[node], self.word_start[node + 1]
+        if start == end:
+            return None
+        offsets, blob = self.word_offsets, self.word_blob
+        return [blob[offsets[i]:offsets[i + 1]] for i in range(start, end)]
+
+    def lookup(self, processed_word: str) -> Optional[List[str]]:
+        """
+            Exact lookup of a processed word
+        Parameters
+        ----------
+            processed_word: str
+                The word to look for
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words indexed under this processed word or None if it is not indexed
+        """
+
+        if not processed_word:
+            return None
+
+        node = 0
+        for letter in processed_word:
+            node = self.child(node, letter)
+            if node is None:
+                return None
+
+        return self.words(node)
+
+    def iter_entries(self) -> Iterator[Tuple[str, str]]:
+        """
+            Enumerate the (processed word, actual word) entries in depth-first order.
+            Inserting them in this order into an empty dictionary gives back the same dictionary
+        Returns
+        ----------
+            entries: Iterator[Tuple[str, str]]
+                The indexed entries
+        """
+
+        stack = [(0, '')]
+        while stack:
+            node, prefix = stack.pop()
+            for actual_word in self.words(node) or ():
+                yield prefix, actual_word
+            stack.extend((child, prefix + letter) for letter, child in reversed(self.edges(node)))
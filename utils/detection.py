@@ -6,14 +6,16 @@ Contents:
     Detector class
 """
 
+from typing import Optional
 from utils.base import Base
+from utils.lexicon import Lexicon
 from utils.wolof_rules import rules_validator
 
 
 class Detector(Base):
 
-    def __init__(self) -> None:
-        super(Detector, self).__init__()
+    def __init__(self, lexicon: Optional[Lexicon] = None) -> None:
+        super(Detector, self).__init__(lexicon)
 
     def is_word(self, word: str) -> bool:
         """
@@ -27,18 +29,11 @@ class Detector(Base):
                 is_wolof_word: bool
                     True if the given word is in the wolof lexicon
         """
-        word_length = len(word)
-        trie_node = self.dictionary
-        for i, letter in enumerate(word.lower()):
-            if letter in trie_node.children:
-                trie_node = trie_node.children[letter]
-                if i == word_length - 1:
-                    if trie_node.words_at_node is not None:
-                        return True
-                    else:
-                        return False
-            else:
-                return False
+        if not word:
+            return None
+
+        # exact lookups use the hash set (or Bloom filter) of the lexicon, the trie serves the fuzzy searches
+        return self.lexicon.contains(word.lower())
 
     def checker(self, word: str) -> bool:
         """
@@ -4,10 +4,17 @@ dictionary
 A dictionary class to allow indexing words from lexicon file
 Contents:
     constructor,
-    insert_word
+    insert_word,
+    remove_word,
+    updated,
+    child,
+    edges,
+    words,
+    lookup,
+    iter_entries
 """
 
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
 class Dictionary(object):
@@ -36,3 +43,206 @@ class Dictionary(object):
             if trie_node.words_at_node is None:
                 trie_node.words_at_node = list()
             trie_node.words_at_node.append(actual_word)
+
+    def remove_word(self, words: List[Tuple[str, str]]) -> int:
+        """
+            Remove indexed words from the Trie dictionary, pruning the nodes left without words nor children
+        Parameters
+        ----------
+            words: List[Tuple[str, str]]
+                The list of (processed word, actual word) entries to remove, every occurrence of an actual word
+                indexed under its processed word is removed
+        Returns
+        ----------
+            removed: int
+                The number of entries removed
+        """
+
+        removed = 0
+        for processed_word, actual_word in words:
+            path = [self]
+            for letter in processed_word:
+                trie_node = path[-1].children.get(letter)
+                if trie_node is None:
+                    break
+                path.append(trie_node)
+            else:
+                removed += path[-1]._remove_actual_word(actual_word)
+                self._prune(path, processed_word)
+        return removed
+
+    def _remove_actual_word(self, actual_word: str) -> int:
+        if not self.words_at_node or actual_word not in self.words_at_node:
+            return 0
+        remaining = [word for word in self.words_at_node if word != actual_word]
+        removed = len(self.words_at_node) - len(remaining)
+        self.words_at_node = remaining or None
+        return removed
+
+    @staticmethod
+    def _prune(path: List['Dictionary'], processed_word: str) -> None:
+        # path[i] is reached with processed_word[:i], climb back while the node is empty
+        for depth in range(len(processed_word), 0, -1):
+            trie_node = path[depth]
+            if trie_node.words_at_node is not None or trie_node.children:
+                break
+            del path[depth - 1].children[processed_word[depth - 1]]
+
+    def updated(self, added: List[Tuple[str, str]], removed: List[Tuple[str, str]]) -> 'Dictionary':
+        """
+            Build a new Trie dictionary with some words removed then some words added, leaving this one unchanged.
+            Only the nodes on the paths of the changed words are copied, the other subtrees are shared, so readers
+            of this dictionary are never affected and the update costs O(total length of the changed words)
+        Parameters
+        ----------
+            added: List[Tuple[str, str]]
+                The (processed word, actual word) entries to index
+            removed: List[Tuple[str, str]]
+                The entries to remove, as in remove_word
+        Returns
+        ----------
+            dictionary: Dictionary
+                The updated dictionary
+        """
+
+        root = self._copy()
+        # ids of the nodes created for the new dictionary, which can be modified in place
+        owned = {id(root)}
+
+        def own_path(processed_word: str, create: bool) -> Optional[List[Dictionary]]:
+            path = [root]
+            for letter in processed_word:
+                trie_node = path[-1].children.get(letter)
+                if trie_node is None:
+                    if not create:
+                        return None
+                    trie_node = Dictionary()
+                elif id(trie_node) in owned:
+                    path.append(trie_node)
+                    continue
+                else:
+                    trie_node = trie_node._copy()
+                owned.add(id(trie_node))
+                # replacing the value of an existing key keeps the order of the children
+                path[-1].children[letter] = trie_node
+                path.append(trie_node)
+            return path
+
+        for processed_word, actual_word in removed:
+            words_at_node = root.lookup(processed_word)
+            if not words_at_node or actual_word not in words_at_node:
+                continue
+            path = own_path(processed_word, create=False)
+            path[-1]._remove_actual_word(actual_word)
+            self._prune(path, processed_word)
+
+        for processed_word, actual_word in added:
+            trie_node = own_path(processed_word, create=True)[-1]
+            if trie_node.words_at_node is None:
+                trie_node.words_at_node = list()
+            trie_node.words_at_node.append(actual_word)
+
+        return root
+
+    def _copy(self) -> 'Dictionary':
+        trie_node = Dictionary()
+        trie_node.children = dict(self.children)
+        if self.words_at_node is not None:
+            trie_node.words_at_node = list(self.words_at_node)
+        return trie_node
+
+    @property
+    def root(self) -> 'Dictionary':
+        """
+            The handle of the root node, used by the traversal methods below
+        """
+
+        return self
+
+    def child(self, node: 'Dictionary', letter: str) -> Optional['Dictionary']:
+        """
+            Get the child of a node reached with a given letter
+        Parameters
+        ----------
+            node: Dictionary
+                The node handle
+            letter: str
+                The letter of the edge to follow
+        Returns
+        ----------
+            child: Optional[Dictionary]
+                The child node handle or None if there is no such edge
+        """
+
+        return node.children.get(letter)
+
+    def edges(self, node: 'Dictionary') -> Iterable[Tuple[str, 'Dictionary']]:
+        """
+            Get the (letter, child) pairs of a node in insertion order
+        Parameters
+        ----------
+            node: Dictionary
+                The node handle
+        Returns
+        ----------
+            edges: Iterable[Tuple[str, Dictionary]]
+                The letters and child node handles
+        """
+
+        return node.children.items()
+
+    def words(self, node: 'Dictionary') -> Optional[List[str]]:
+        """
+            Get the words indexed at a node
+        Parameters
+        ----------
+            node: Dictionary
+                The node handle
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words ending at this node or None if no word ends here
+        """
+
+        return node.words_at_node
+
+    def lookup(self, processed_word: str) -> Optional[List[str]]:
+        """
+            Exact lookup of a processed word
+        Parameters
+        ----------
+            processed_word: str
+                The word to look for
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words indexed under this processed word or None if it is not indexed
+        """
+
+        if not processed_word:
+            return None
+
+        trie_node = self
+        for letter in processed_word:
+            trie_node = trie_node.children.get(letter)
+            if trie_node is None:
+                return None
+
+        return trie_node.words_at_node
+
+    def iter_entries(self) -> Iterator[Tuple[str, str]]:
+        """
+            Enumerate the (processed word, actual word) entries in depth-first order.
+            Inserting them in this order into an empty dictionary gives back the same dictionary
+        Returns
+        ----------
+            entries: Iterator[Tuple[str, str]]
+                The indexed entries
+        """
+
+        stack = [(self, '')]
+        while stack:
+            trie_node, prefix = stack.pop()
+            for actual_word in trie_node.words_at_node or ():
+                yield prefix, actual_word
+            stack.extend((child, prefix + letter) for letter, child in reversed(trie_node.children.items()))
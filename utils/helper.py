@@ -2,18 +2,26 @@
 helper
 -----
 Helper functions that are used by algorithms
-Also contains 2 implementations to compute edit distance between 2 strings
+Also contains 3 implementations to compute edit distance between 2 strings
 Contents:
+    language_code,
     fr_en_word,
+    fr_en_words,
     word_preprocessing,
+    tokenize,
     replace_cost,
+    substitution_table,
     sort_list,
     recursive_levenshtein,
-    dynamic_levenshtein
+    dynamic_levenshtein,
+    weighted_dynamic_levenshtein
 """
 
-from typing import List
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
 from polyglot.detect import Detector
+from polyglot.detect.base import UnknownLanguage
 
 
 COST_MATRIX = {('a', 'à'): 1, ('o', 'ó'): 1,
@@ -22,6 +30,35 @@ COST_MATRIX = {('a', 'à'): 1, ('o', 'ó'): 1,
                ('x', 'q'): 1}
 
 
+# words with their inner apostrophes and hyphens (the lexicon holds compounds such as "laafam-ganaar"),
+# everything between two words (spaces, punctuation, quotes) is kept as it is
+TOKEN_PATTERN = re.compile(r"\w+(?:[-']\w+)*")
+
+FR_EN_CODES = frozenset({'fr', 'en'})
+LANGUAGE_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=LANGUAGE_CACHE_SIZE)
+def language_code(text: str) -> Optional[str]:
+    """
+        Identify the language of a text with polyglot. Results are memoized in a bounded LRU cache
+        (see `language_code.cache_info()`)
+        Parameters
+        ----------
+            text: str
+                text which will be checked
+        Returns
+        ----------
+            code: Optional[str]
+                The language code or None if polyglot cannot detect the language (e.g. punctuation, single letters)
+    """
+
+    try:
+        return Detector(text).language.code
+    except UnknownLanguage:
+        return None
+
+
 def fr_en_word(word: str) -> bool:
     """
         Check if a word is either an English or French word and returns True or False
@@ -34,8 +71,24 @@ def fr_en_word(word: str) -> bool:
             checking_answer: bool
                 True if a word is in French or English dictionary
     """
-    detector = Detector(word)
-    return detector.language.code in {'fr', 'en'}
+
+    return language_code(word) in FR_EN_CODES
+
+
+def fr_en_words(words: Iterable[str]) -> bool:
+    """
+        Batch version of `fr_en_word` checking the words of a line as a whole, with a single language identification
+        Parameters
+        ----------
+            words: Iterable[str]
+                words which will be checked together, e.g. the words of a line which are not wolof words
+        Returns
+        ----------
+            checking_answer: bool
+                True if the words, taken together, are in French or English
+    """
+
+    return fr_en_word(' '.join(words))
 
 
 def word_preprocessing(word: str) -> str:
@@ -54,6 +107,23 @@ def word_preprocessing(word: str) -> str:
     return word.lower()
 
 
+def tokenize(text: str) -> Iterator[Tuple[int, int, str]]:
+    """
+        Find the words of a text in a single pass, with their offsets
+        Parameters
+        ----------
+            text: str
+                The text to split, possibly with its line endings
+        Returns
+        ----------
+            tokens: Iterator[Tuple[int, int, str]]
+                The start offset, end offset and text of every word, so that text[start:end] == word
+    """
+
+    for match in TOKEN_PATTERN.finditer(text):
+        yield match.start(), match.end(), match.group()
+
+
 def replace_cost(source: str, target: str) -> float:
     """
         Cost to replace the letter in source with the letter in target
@@ -78,6 +148,22 @@ def replace_cost(source: str, target: str) -> float:
     return 2
 
 
+def substitution_table(alphabet: str) -> List[List[float]]:
+    """
+        Dense table of the cost to replace every letter of an alphabet with every other one
+        Parameters
+        ----------
+            alphabet: str
+                The letters of the table, a letter code is its position in the alphabet
+        Returns
+        ----------
+            table: List[List[float]]
+                table[source_code][target_code] is the cost to replace source with target
+    """
+
+    return [[replace_cost(source, target) for target in alphabet] for source in alphabet]
+
+
 def rank_filter(data: List[tuple], descending: bool = False) -> List[tuple]:
     """
         Sort the list of tuples according to the edit distance
@@ -181,3 +267,38 @@ def dynamic_levenshtein(source: str, target: str) -> int:
                                                             computations_array[(i - 1) % 2][j - 1]+1)))
 
     return computations_array[length_trg % 2][length_src]
+
+
+def weighted_dynamic_levenshtein(source: str, target: str, max_distance: Optional[float] = None) -> float:
+    """
+        Space efficient Dynamic Programming function to find the weighted edit distance between 2 strings,
+        inserting or deleting a letter costs 1 and replacing a letter costs `replace_cost`
+        Time complexity O(mxn)
+        Auxiliary space O(m)
+        Parameters
+        ----------
+            source: str
+                Source word to calculate weighted edit distance
+            target: str
+                Target word to calculate weighted edit distance
+            max_distance: Optional[float]
+                Stop as soon as the distance is known to exceed this value
+        Returns
+        ----------
+            weighted_edit_distance: float
+                Weighted distance required to convert a source string to target string,
+                or a value greater than `max_distance` if the computation was stopped
+    """
+
+    previous_row = list(range(len(target) + 1))
+
+    for i, source_letter in enumerate(source, 1):
+        current_row = [i]
+        for j, target_letter in enumerate(target, 1):
+            current_row.append(min(previous_row[j] + 1, current_row[j - 1] + 1,
+                                   previous_row[j - 1] + replace_cost(source_letter, target_letter)))
+        if max_distance is not None and min(current_row) > max_distance:
+            return min(current_row)
+        previous_row = current_row
+
+    return previous_row[-1]
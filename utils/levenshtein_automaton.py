@@ -0,0 +1,93 @@
+"""
+levenshtein_automaton
+-----
+A weighted Levenshtein automaton: a deterministic automaton accepting the words within a maximum weighted edit
+distance of a given word, to be intersected with the lexicon trie.
+A state is a row of the dynamic-programming table where the distances above the maximum distance are replaced by
+infinity, so the many trie prefixes sharing a row share a state. States and transitions are built on first use
+then reused, so walking the trie costs one table lookup per node instead of one row computation
+Contents:
+    LevenshteinAutomaton class,
+    add_transition
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+INFINITY = float('inf')
+
+
+class LevenshteinAutomaton(object):
+
+    def __init__(self, word: str, max_distance: float, letter_costs: Mapping[str, Sequence[float]]) -> None:
+        """
+            Parameters
+            ----------
+                word: str
+                    The preprocessed word whose neighbours are accepted
+                max_distance: float
+                    The maximum weighted edit distance of the accepted words
+                letter_costs: Mapping[str, Sequence[float]]
+                    The cost to replace a letter with each letter of the word, insertions and deletions cost 1
+        """
+
+        self.word = word
+        self.max_distance = max_distance
+        self.letter_costs = letter_costs
+        self.states: List[Tuple[float, ...]] = []
+        self.state_ids: Dict[Tuple[float, ...], int] = {}
+        # transitions[state][letter] = next state, distances[state] = distance of the word if accepted else None,
+        # live[state] = some continuation may still be accepted
+        self.transitions: List[Dict[str, int]] = []
+        self.distances: List[Optional[float]] = []
+        self.live: List[bool] = []
+        self.start = self._state_id(tuple(self._cap(value) for value in range(len(word) + 1)))
+
+    def _cap(self, value: float) -> float:
+        return value if value <= self.max_distance else INFINITY
+
+    def _state_id(self, row: Tuple[float, ...]) -> int:
+        state_id = self.state_ids.get(row)
+        if state_id is None:
+            state_id = len(self.states)
+            self.states.append(row)
+            self.state_ids[row] = state_id
+            self.transitions.append({})
+            self.distances.append(row[-1] if row[-1] <= self.max_distance else None)
+            self.live.append(min(row) <= self.max_distance)
+        return state_id
+
+    def add_transition(self, state_id: int, letter: str) -> int:
+        """
+            Compute the state reached from a state by reading a letter
+            Parameters
+            ----------
+                state_id: int
+                    The state read from
+                letter: str
+                    The letter read
+            Returns
+            ----------
+                next_state_id: int
+                    The state reached, also stored in transitions[state_id][letter]
+        """
+
+        previous_row = self.states[state_id]
+        costs = self.letter_costs[letter]
+        max_distance = self.max_distance
+
+        value = previous_row[0] + 1
+        row = [value if value <= max_distance else INFINITY]
+        for i in range(1, len(previous_row)):
+            substitution = previous_row[i - 1] + costs[i - 1]
+            deletion = previous_row[i] + 1
+            insertion = value + 1
+            value = substitution if substitution < deletion else deletion
+            if insertion < value:
+                value = insertion
+            if value > max_distance:
+                value = INFINITY
+            row.append(value)
+
+        next_state_id = self._state_id(tuple(row))
+        self.transitions[state_id][letter] = next_state_id
+        return next_state_id
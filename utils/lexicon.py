@@ -0,0 +1,332 @@
+"""
+lexicon
+-----
+The lexicon index shared by all the spelling correction and word suggestion algorithms.
+The index is built once per process and reused by every Detector/Corrector instance.
+Exact membership is answered by a hash set of the processed words (or a Bloom filter to save memory),
+the trie serving the fuzzy searches. A lexicon can also be opened from a memory-mapped binary snapshot of its
+index (see lexicon_snapshot), without parsing nor indexing anything.
+Contents:
+    lexicon_entry,
+    read_lexicon_entries,
+    Lexicon class,
+    load_lexicon,
+    clear_lexicon_cache
+"""
+
+import copy
+import os
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+from utils.bloom import BloomFilter
+from utils.compact_dictionary import CompactDictionary
+from utils.dictionary import Dictionary
+from utils.lexicon_snapshot import MappedDictionary, is_snapshot
+from utils.helper import word_preprocessing
+
+# the wolof lexicon shipped with the package, independent of the current working directory
+lex_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wolof_lexicon.txt')
+
+MEMBERSHIPS = ('set', 'bloom', 'trie')
+BLOOM_ERROR_RATE = 1e-4
+
+_lexicons: Dict[Tuple[str, bool, str], 'Lexicon'] = {}
+_lexicons_lock = threading.Lock()
+
+
+def lexicon_entry(word: str) -> Tuple[str, str]:
+    """
+        The (processed word, actual word) entry under which a word of a lexicon file is indexed
+        Parameters
+        ----------
+            word: str
+                A word of the lexicon file
+        Returns
+        ----------
+            entry: Tuple[str, str]
+                The processed word and the actual word
+    """
+
+    word = word_preprocessing(word).strip()
+    return word_preprocessing(word), word
+
+
+def read_lexicon_entries(filepath: str) -> List[Tuple[str, str]]:
+    """
+        Read the entries of a lexicon file (whitespace separated words)
+        Parameters
+        ----------
+            filepath: str
+                Path of the lexicon file
+        Returns
+        ----------
+            entries: List[Tuple[str, str]]
+                The (processed word, actual word) entries of the file, in file order
+    """
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        vocab_file = f.read().split()
+
+    return [lexicon_entry(word) for word in vocab_file]
+
+
+class Lexicon(object):
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = (), filepath: Optional[str] = None,
+                 compact: bool = False, membership: str = 'set') -> None:
+        """
+            Index the given (processed word, actual word) entries in a Trie dictionary
+            Parameters
+            ----------
+                entries: Iterable[Tuple[str, str]]
+                    The processed and actual words to index
+                filepath: Optional[str]
+                    The lexicon file the entries were read from, if any
+                compact: bool
+                    Use the array-backed CompactDictionary instead of the Dictionary of node objects
+                membership: str
+                    How `contains` answers exact lookups: 'set' with a frozen hash set of the processed words,
+                    'bloom' with a Bloom filter using a fraction of the memory but accepting about one unknown
+                    word in 1 / BLOOM_ERROR_RATE, 'trie' by walking the trie
+        """
+
+        if membership not in MEMBERSHIPS:
+            raise ValueError('Unknown membership {!r}, expected one of {}'.format(membership, ', '.join(MEMBERSHIPS)))
+
+        entries = list(entries)
+        self.filepath = filepath
+        self.compact = compact
+        self.membership = membership
+        self.size = len(entries)
+        self.dictionary = CompactDictionary() if compact else Dictionary()
+        self.dictionary.insert_word(entries)
+        self.words: Optional[FrozenSet[str]] = None
+        self.bloom_filter: Optional[BloomFilter] = None
+        self._build_membership(processed_word for processed_word, _ in entries)
+        self._indexes = {}
+        self._indexes_lock = threading.Lock()
+
+    def _build_membership(self, processed_words: Iterable[str]) -> None:
+        """
+            Build the exact lookup structure and bind `contains(processed_word) -> bool` to its own
+            __contains__, so that a lookup costs a single call
+        """
+
+        if self.membership == 'set':
+            self.words = frozenset(processed_words)
+            self.contains = self.words.__contains__
+        elif self.membership == 'bloom':
+            self.bloom_filter = BloomFilter.from_words(processed_words, BLOOM_ERROR_RATE)
+            self.contains = self.bloom_filter.__contains__
+        else:
+            self.contains = self._trie_contains
+
+    def _trie_contains(self, processed_word: str) -> bool:
+        return self.dictionary.lookup(processed_word) is not None
+
+    @classmethod
+    def from_file(cls, filepath: str = lex_filepath, compact: bool = False, membership: str = 'set') -> 'Lexicon':
+        """
+            Read a lexicon file (whitespace separated words) and index its words
+            Parameters
+            ----------
+                filepath: str
+                    Path of the lexicon file
+                compact: bool
+                    Use the array-backed CompactDictionary
+                membership: str
+                    The exact lookup structure, 'set', 'bloom' or 'trie'
+            Returns
+            ----------
+                lexicon: Lexicon
+                    The lexicon index of the file
+        """
+
+        return cls(read_lexicon_entries(filepath), filepath=filepath, compact=compact, membership=membership)
+
+    @classmethod
+    def from_snapshot(cls, filepath: str, membership: str = 'trie') -> 'Lexicon':
+        """
+            Open a lexicon snapshot (see lexicon_snapshot.write_snapshot), its trie being queried in the mapped file
+            Parameters
+            ----------
+                filepath: str
+                    Path of the snapshot file
+                membership: str
+                    The exact lookup structure. 'trie' looks words up in the mapped file, 'set' and 'bloom' are
+                    built from all the words and make the startup as slow as reading the text lexicon
+            Returns
+            ----------
+                lexicon: Lexicon
+                    The lexicon index of the snapshot, modified copies of it are CompactDictionary based
+        """
+
+        lexicon = cls(filepath=filepath, compact=True, membership=membership)
+        lexicon.dictionary = MappedDictionary(filepath)
+        lexicon.size = lexicon.dictionary.word_count
+        # the entries are only read by the 'set' and 'bloom' memberships
+        lexicon._update_membership(lexicon.dictionary.iter_entries(), ())
+        return lexicon
+
+    def copy(self) -> 'Lexicon':
+        """
+            Build a private copy of the lexicon which can be modified without affecting the shared one
+            Returns
+            ----------
+                lexicon: Lexicon
+                    The new lexicon index
+        """
+
+        return Lexicon(self.dictionary.iter_entries(), filepath=self.filepath, compact=self.compact,
+                       membership=self.membership)
+
+    def insert_word(self, words: List[Tuple[str, str]]) -> None:
+        """
+            Add (processed word, actual word) entries to the index.
+            Must never be called on a lexicon returned by `load_lexicon`, use a `copy` instead.
+            Parameters
+            ----------
+                words: List[Tuple[str, str]]
+                    The list of words to index
+        """
+
+        self.size += len(words)
+        self.dictionary.insert_word(words)
+        self._update_membership(words, ())
+        self._indexes.clear()
+
+    def remove_word(self, words: List[Tuple[str, str]]) -> int:
+        """
+            Remove (processed word, actual word) entries from the index, pruning the trie nodes left empty.
+            Must never be called on a lexicon returned by `load_lexicon`, use a `copy` or `updated` instead.
+            Parameters
+            ----------
+                words: List[Tuple[str, str]]
+                    The list of words to remove
+            Returns
+            ----------
+                removed: int
+                    The number of entries removed
+        """
+
+        removed = self.dictionary.remove_word(words)
+        self.size -= removed
+        self._update_membership((), words)
+        self._indexes.clear()
+        return removed
+
+    def updated(self, added: List[Tuple[str, str]], removed: List[Tuple[str, str]]) -> 'Lexicon':
+        """
+            Build a new lexicon with some entries removed then some entries added, leaving this one unchanged so that
+            the searches running on it are not affected. The trie nodes which do not lead to a changed word are
+            shared with this lexicon, the derived indexes are built again on first use.
+            The new lexicon is no longer the content of a file, its filepath is None
+            Parameters
+            ----------
+                added: List[Tuple[str, str]]
+                    The (processed word, actual word) entries to index
+                removed: List[Tuple[str, str]]
+                    The entries to remove
+            Returns
+            ----------
+                lexicon: Lexicon
+                    The updated lexicon
+        """
+
+        removed_count = 0
+        for processed_word, actual_word in set(removed):
+            actual_words = self.dictionary.lookup(processed_word)
+            if actual_words:
+                removed_count += actual_words.count(actual_word)
+
+        lexicon = copy.copy(self)
+        lexicon.filepath = None
+        lexicon.size = self.size - removed_count + len(added)
+        lexicon.dictionary = self.dictionary.updated(added, removed)
+        lexicon._update_membership(added, removed)
+        lexicon._indexes = {}
+        lexicon._indexes_lock = threading.Lock()
+        return lexicon
+
+    def _update_membership(self, added: Iterable[Tuple[str, str]], removed: Iterable[Tuple[str, str]]) -> None:
+        if self.membership == 'set':
+            # a processed word stays while other actual words are indexed under it
+            gone = {processed_word for processed_word, _ in removed if self.dictionary.lookup(processed_word) is None}
+            self._build_membership(self.words.difference(gone).union(processed_word for processed_word, _ in added))
+        elif self.membership == 'bloom':
+            # words cannot be removed from a Bloom filter, and it is sized for its words: rebuild it
+            self._build_membership(processed_word for processed_word, _ in self.dictionary.iter_entries())
+        elif self.membership == 'trie':
+            # a copy made by `updated` still has `contains` bound to the original lexicon
+            self._build_membership(())
+
+    def get_index(self, name: Hashable, build: Callable[['Lexicon'], Any]) -> Any:
+        """
+            Return an index derived from the lexicon (e.g. the symmetric delete index), building it on first use.
+            Derived indexes are shared by every instance using this lexicon
+            Parameters
+            ----------
+                name: Hashable
+                    The key of the index, including the parameters it was built with
+                build: Callable[[Lexicon], Any]
+                    Function building the index from the lexicon
+            Returns
+            ----------
+                index: Any
+                    The derived index
+        """
+
+        index = self._indexes.get(name)
+        if index is None:
+            with self._indexes_lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = build(self)
+                    self._indexes[name] = index
+        return index
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def load_lexicon(filepath: str = lex_filepath, compact: bool = False, membership: Optional[str] = None) -> Lexicon:
+    """
+        Return the shared lexicon index of a lexicon file, building it on first use.
+        Indexes are cached per process: build them before forking workers so that they are inherited
+        copy-on-write instead of being rebuilt in every child process.
+        Parameters
+        ----------
+            filepath: str
+                Path of the lexicon file, a text lexicon or a snapshot
+            compact: bool
+                Use the array-backed CompactDictionary (a snapshot is always queried in its mapped arrays)
+            membership: Optional[str]
+                The exact lookup structure, 'set', 'bloom' or 'trie'. Defaults to 'set' for a text lexicon and to
+                'trie' for a snapshot, which then opens without reading its words
+        Returns
+        ----------
+            lexicon: Lexicon
+                The shared lexicon index
+    """
+
+    key = (os.path.abspath(filepath), compact, membership)
+    lexicon = _lexicons.get(key)
+    if lexicon is None:
+        with _lexicons_lock:
+            lexicon = _lexicons.get(key)
+            if lexicon is None:
+                if is_snapshot(filepath):
+                    lexicon = Lexicon.from_snapshot(filepath, membership=membership or 'trie')
+                else:
+                    lexicon = Lexicon.from_file(filepath, compact=compact, membership=membership or 'set')
+                _lexicons[key] = lexicon
+    return lexicon
+
+
+def clear_lexicon_cache() -> None:
+    """
+        Forget every shared lexicon index so that the next `load_lexicon` call reads the file again
+    """
+
+    with _lexicons_lock:
+        _lexicons.clear()
@@ -0,0 +1,209 @@
+"""
+lexicon_reloader
+-----
+Hot reload of the lexicon of a long-running SpellChecker. The lexicon file and an optional delta file are watched:
+when either changes, the words to add and remove are computed against the index in use, an updated index sharing
+the unchanged trie nodes is built (see Lexicon.updated) and atomically swapped in, the running calls finishing
+with the previous one. The lexicon file is never indexed again from scratch.
+A delta file holds one change per line, "+word" to add a word and "-word" to remove it, blank lines and lines
+starting with "#" being ignored. Changes are idempotent: the delta file can be appended to and applied again
+Contents:
+    read_delta,
+    LexiconReloader class,
+    poll,
+    reload,
+    start,
+    stop
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from utils.lexicon import lexicon_entry, read_lexicon_entries
+from utils.lexicon_snapshot import is_snapshot
+from utils.spellchecker import SpellChecker
+
+RELOAD_INTERVAL = 5.0
+
+
+def read_delta(filepath: str) -> Dict[str, str]:
+    """
+        Read a lexicon delta file
+        Parameters
+        ----------
+            filepath: str
+                Path of the delta file
+        Returns
+        ----------
+            changes: Dict[str, str]
+                The last change ('+' or '-') of each word of the file, in file order
+    """
+
+    changes = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            change, word = line[0], line[1:].strip()
+            if change not in '+-' or not word or len(word.split()) > 1:
+                raise ValueError('{}:{}: expected "+word" or "-word", got {!r}'.format(filepath, line_number, line))
+            # a later change of the same word overrides the earlier ones
+            changes.pop(word, None)
+            changes[word] = change
+    return changes
+
+
+def _file_signature(filepath: Optional[str]) -> Optional[Tuple[int, int]]:
+    if filepath is None:
+        return None
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LexiconReloader(object):
+
+    def __init__(self, spellchecker: SpellChecker, lexicon_filepath: Optional[str] = None,
+                 delta_filepath: Optional[str] = None, interval: float = RELOAD_INTERVAL) -> None:
+        """
+            Parameters
+            ----------
+                spellchecker: SpellChecker
+                    The spell checker whose lexicon is updated
+                lexicon_filepath: Optional[str]
+                    The lexicon file to watch, defaults to the file of the lexicon of the spell checker
+                delta_filepath: Optional[str]
+                    The delta file to watch and apply on top of the lexicon file, if any
+                interval: float
+                    The minimum time (seconds) between two checks of the files by `poll`
+        """
+
+        self.spellchecker = spellchecker
+        self.lexicon_filepath = lexicon_filepath if lexicon_filepath is not None else spellchecker.lexicon.filepath
+        if self.lexicon_filepath is None:
+            raise ValueError('the lexicon of the spell checker was not read from a file, give lexicon_filepath')
+        if is_snapshot(self.lexicon_filepath):
+            raise ValueError('{} is a lexicon snapshot, watch the text lexicon it was built from'.format(
+                self.lexicon_filepath))
+        self.delta_filepath = delta_filepath
+        self.interval = interval
+        self.reloads = 0
+        self.last_error: Optional[Exception] = None
+        # the index in use was built from the lexicon file as it is now, the delta file is applied on first poll
+        self._signatures = (_file_signature(self.lexicon_filepath), None)
+        self._file_entries: Optional[Counter] = None
+        self._file_entries_signature = None
+        self._last_poll = float('-inf')
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> bool:
+        """
+            Reload the lexicon if the lexicon or delta file changed since the last check. Cheap enough to be called
+            before every batch of requests: the files are checked at most once per `interval`, and a call made
+            while another thread is reloading returns immediately
+            Returns
+            ----------
+                reloaded: bool
+                    True if an updated lexicon was swapped in
+        """
+
+        now = time.monotonic()
+        if now - self._last_poll < self.interval or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_poll = now
+            signatures = (_file_signature(self.lexicon_filepath), _file_signature(self.delta_filepath))
+            if signatures == self._signatures:
+                return False
+            # a file being written may fail to parse, it is read again once it changes again
+            self._signatures = signatures
+            try:
+                return self._reload()
+            except (OSError, ValueError) as error:
+                self.last_error = error
+                print('lexicon reload failed, keeping the current lexicon: {}'.format(error), file=sys.stderr)
+                return False
+        finally:
+            self._lock.release()
+
+    def reload(self) -> bool:
+        """
+            Apply the lexicon and delta files now
+            Returns
+            ----------
+                reloaded: bool
+                    True if an updated lexicon was swapped in, False if the lexicon was already up to date
+        """
+
+        with self._lock:
+            self._signatures = (_file_signature(self.lexicon_filepath), _file_signature(self.delta_filepath))
+            return self._reload()
+
+    def _target_entries(self) -> Counter:
+        # the entries of the lexicon file are read again only when the file changed
+        signature = _file_signature(self.lexicon_filepath)
+        if self._file_entries is None or signature != self._file_entries_signature:
+            self._file_entries = Counter(read_lexicon_entries(self.lexicon_filepath))
+            self._file_entries_signature = signature
+
+        entries = Counter(self._file_entries)
+        if self.delta_filepath is not None and os.path.exists(self.delta_filepath):
+            for word, change in read_delta(self.delta_filepath).items():
+                entry = lexicon_entry(word)
+                if change == '+':
+                    entries[entry] = max(entries[entry], 1)
+                else:
+                    del entries[entry]
+        return entries
+
+    def _reload(self) -> bool:
+        target = self._target_entries()
+        lexicon = self.spellchecker.lexicon
+        current = Counter(lexicon.dictionary.iter_entries())
+
+        added: List[Tuple[str, str]] = []
+        removed: List[Tuple[str, str]] = []
+        # sorted, so that the order of the new trie nodes does not depend on the hashing of the entries
+        for entry in sorted(current.keys() | target.keys()):
+            if current[entry] != target[entry]:
+                # every occurrence of a removed entry is removed, the expected number is added back
+                if current[entry]:
+                    removed.append(entry)
+                added.extend([entry] * target[entry])
+
+        if not added and not removed:
+            return False
+
+        self.spellchecker.set_lexicon(lexicon.updated(added, removed))
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def start(self) -> None:
+        """
+            Poll the files every `interval` seconds in a background thread
+        """
+
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='lexicon-reloader', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,273 @@
+"""
+lexicon_snapshot
+-----
+A versioned binary snapshot of the lexicon index, queried in place through a read-only memory map.
+The snapshot holds the arrays of a CompactDictionary (see compact_dictionary) one after the other, so opening it
+neither parses the lexicon nor builds the trie: the arrays are memoryviews over the mapped file, whose pages are
+read on demand and shared through the OS page cache by every process mapping the same file.
+Layout (native byte order, every section aligned on 8 bytes):
+    header        magic, format version, byte order mark, node, edge and word counts, blob and letters sizes
+    edge_start    uint32[node_count + 1]
+    edge_label    uint16[edge_count]
+    edge_target   uint32[edge_count]
+    word_start    uint32[node_count + 1]
+    word_offsets  uint32[word_count + 1], byte offsets in the blob
+    word_blob     the actual words, utf-8 encoded
+    letters       the letters of the edge labels, utf-8 encoded
+Contents:
+    write_snapshot,
+    is_snapshot,
+    MappedDictionary class
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+from utils.compact_dictionary import CompactDictionary
+
+MAGIC = b'WOLOFIDX'
+FORMAT_VERSION = 1
+# read back as another number on a machine of the other byte order
+BYTE_ORDER_MARK = 0x01020304
+_HEADER = struct.Struct('=8sIIIIIII')
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def write_snapshot(dictionary: CompactDictionary, filepath: str) -> int:
+    """
+        Write the snapshot of an index. The file is written next to its final path then renamed, so that processes
+        mapping the previous snapshot keep reading it unchanged
+        Parameters
+        ----------
+            dictionary: CompactDictionary
+                The index to save
+            filepath: str
+                Path of the snapshot file
+        Returns
+        ----------
+            size: int
+                The size of the file in bytes
+    """
+
+    # the character offsets of the words become byte offsets of their utf-8 encoding
+    word_offsets = array('I', [0])
+    blob = []
+    offset = 0
+    offsets, word_blob = dictionary.word_offsets, dictionary.word_blob
+    for i in range(len(offsets) - 1):
+        encoded_word = word_blob[offsets[i]:offsets[i + 1]].encode('utf-8')
+        blob.append(encoded_word)
+        offset += len(encoded_word)
+        word_offsets.append(offset)
+    blob = b''.join(blob)
+    letters = dictionary.letters.encode('utf-8')
+
+    sections = [dictionary.edge_start.tobytes(), dictionary.edge_label.tobytes(), dictionary.edge_target.tobytes(),
+                dictionary.word_start.tobytes(), word_offsets.tobytes(), blob, letters]
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, dictionary.node_count, len(dictionary.edge_label),
+                          len(word_offsets) - 1, len(blob), len(letters))
+
+    temporary_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+    size = 0
+    try:
+        with open(temporary_filepath, 'wb') as f:
+            for section in [header] + sections:
+                f.write(section)
+                f.write(bytes(_padding(len(section))))
+                size += len(section) + _padding(len(section))
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        if os.path.exists(temporary_filepath):
+            os.remove(temporary_filepath)
+        raise
+    return size
+
+
+def is_snapshot(filepath: str) -> bool:
+    """
+        Check if a file is a lexicon snapshot rather than a text lexicon
+        Parameters
+        ----------
+            filepath: str
+                Path of the file
+        Returns
+        ----------
+            is_snapshot: bool
+                True if the file starts with the snapshot magic
+    """
+
+    with open(filepath, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class MappedDictionary(object):
+
+    def __init__(self, filepath: str) -> None:
+        """
+            Map a snapshot file. It exposes the read-only traversal methods of CompactDictionary
+            Parameters
+            ----------
+                filepath: str
+                    Path of the snapshot file
+        """
+
+        with open(filepath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if len(view) < _HEADER.size:
+            raise ValueError('{} is not a lexicon snapshot'.format(filepath))
+        (magic, version, byte_order_mark, node_count, edge_count, word_count, blob_size,
+         letters_size) = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError('{} is not a lexicon snapshot'.format(filepath))
+        if version != FORMAT_VERSION:
+            raise ValueError('{} is a version {} lexicon snapshot, version {} is expected: build it again'.format(
+                filepath, version, FORMAT_VERSION))
+        if byte_order_mark != BYTE_ORDER_MARK:
+            raise ValueError('{} was built on a machine of another byte order: build it again'.format(filepath))
+
+        position = _HEADER.size + _padding(_HEADER.size)
+
+        def section(size: int, format_code: Optional[str] = None) -> memoryview:
+            nonlocal position
+            data = view[position:position + size]
+            position += size + _padding(size)
+            return data.cast(format_code) if format_code is not None else data
+
+        self.edge_start = section(4 * (node_count + 1), 'I')
+        self.edge_label = section(2 * edge_count, 'H')
+        self.edge_target = section(4 * edge_count, 'I')
+        self.word_start = section(4 * (node_count + 1), 'I')
+        self.word_offsets = section(4 * (word_count + 1), 'I')
+        self.word_blob = section(blob_size)
+        self.letters = str(section(letters_size), 'utf-8')
+        self.codes = {letter: code for code, letter in enumerate(self.letters)}
+        self.filepath = filepath
+        self.word_count = word_count
+
+    @property
+    def node_count(self) -> int:
+        return len(self.edge_start) - 1
+
+    @property
+    def root(self) -> int:
+        return 0
+
+    def child(self, node: int, letter: str) -> Optional[int]:
+        """
+            Get the child of a node reached with a given letter
+        Parameters
+        ----------
+            node: int
+                The node handle
+            letter: str
+                The letter of the edge to follow
+        Returns
+        ----------
+            child: Optional[int]
+                The child node handle or None if there is no such edge
+        """
+
+        code = self.codes.get(letter)
+        if code is None:
+            return None
+        edge_label = self.edge_label
+        for i in range(self.edge_start[node], self.edge_start[node + 1]):
+            if edge_label[i] == code:
+                return self.edge_target[i]
+        return None
+
+    def edges(self, node: int) -> Iterable[Tuple[str, int]]:
+        """
+            Get the (letter, child) pairs of a node in insertion order
+        Parameters
+        ----------
+            node: int
+                The node handle
+        Returns
+        ----------
+            edges: Iterable[Tuple[str, int]]
+                The letters and child node handles
+        """
+
+        start, end = self.edge_start[node], self.edge_start[node + 1]
+        letters, edge_label, edge_target = self.letters, self.edge_label, self.edge_target
+        return [(letters[edge_label[i]], edge_target[i]) for i in range(start, end)]
+
+    def words(self, node: int) -> Optional[List[str]]:
+        """
+            Get the words indexed at a node
+        Parameters
+        ----------
+            node: int
+                The node handle
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words ending at this node or None if no word ends here
+        """
+
+        start, end = self.word_start[node], self.word_start[node + 1]
+        if start == end:
+            return None
+        offsets, blob = self.word_offsets, self.word_blob
+        return [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(start, end)]
+
+    def lookup(self, processed_word: str) -> Optional[List[str]]:
+        """
+            Exact lookup of a processed word
+        Parameters
+        ----------
+            processed_word: str
+                The word to look for
+        Returns
+        ----------
+            words: Optional[List[str]]
+                The actual words indexed under this processed word or None if it is not indexed
+        """
+
+        if not processed_word:
+            return None
+
+        node = 0
+        for letter in processed_word:
+            node = self.child(node, letter)
+            if node is None:
+                return None
+
+        return self.words(node)
+
+    def iter_entries(self) -> Iterator[Tuple[str, str]]:
+        """
+            Enumerate the (processed word, actual word) entries in depth-first order.
+            Inserting them in this order into an empty dictionary gives back the same dictionary
+        Returns
+        ----------
+            entries: Iterator[Tuple[str, str]]
+                The indexed entries
+        """
+
+        stack = [(0, '')]
+        while stack:
+            node, prefix = stack.pop()
+            for actual_word in self.words(node) or ():
+                yield prefix, actual_word
+            stack.extend((child, prefix + letter) for letter, child in reversed(self.edges(node)))
+
+    def updated(self, added: List[Tuple[str, str]], removed: List[Tuple[str, str]]) -> CompactDictionary:
+        """
+            Build an in-memory CompactDictionary with some words removed then some words added, see
+            CompactDictionary.updated. The snapshot itself is read-only
+        """
+
+        removed_words = set(removed)
+        entries = [entry for entry in self.iter_entries() if entry not in removed_words]
+        entries.extend(added)
+        dictionary = CompactDictionary(self.letters)
+        dictionary._build(entries)
+        return dictionary
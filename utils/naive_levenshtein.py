@@ -13,10 +13,15 @@ Contents:
     insert_letter,
     edit_one_letter,
     edit_two_letters,
+    iter_one_letter_edits,
+    iter_two_letter_edits,
+    get_vocab,
     get_suggestions
 """
 
 from collections import Counter
+from collections.abc import Set as AbstractSet
+from typing import Collection, FrozenSet, Iterable, Iterator, Mapping
 from utils.wolof_rules import compound_sound_transformation
 
 WOLOF_LETTERS = 'aàãbcdeéëfgijklmnñŋoópqrstuwxy'
@@ -245,18 +250,89 @@ def edit_two_letters(word: str, verbose: bool = False, allow_switch: bool = Fals
     return two_edit_set
 
 
-def get_suggestions(word: str, probs: dict, vocab: list[str],
+def iter_one_letter_edits(word: str, allow_switch: bool = False) -> Iterator[str]:
+    """
+        Lazily generates the strings one edit away from a word, the same strings as edit_one_letter without
+        building their set (a string may be generated more than once)
+        Parameters
+        ----------
+            word: str
+                input for which we generate all possible words one edit away
+            allow_switch: bool
+                allows switch operation to be taken into account
+        Returns
+        ----------
+            edits: Iterator[str]
+                words obtained with one edit from the given word
+    """
+
+    word = word.lower()
+    for i in range(len(word) + 1):
+        left, right = word[:i], word[i:]
+        if right:
+            yield left + right[1:]
+            if allow_switch and len(right) >= 2:
+                yield left + right[1] + right[0] + right[2:]
+            for letter in WOLOF_LETTERS:
+                if letter != right[0]:
+                    yield left + letter + right[1:]
+        for letter in WOLOF_LETTERS:
+            yield left + letter + right
+
+
+def iter_two_letter_edits(word: str, allow_switch: bool = False) -> Iterator[str]:
+    """
+        Lazily generates the strings two edits away from a word: the edits of each distinct string one edit away.
+        Only the set of the strings one edit away is kept in memory, never the much larger set of edit_two_letters
+        Parameters
+        ----------
+            word: str
+                input for which we generate all possible words two edits away
+            allow_switch: bool
+                allows switch operation to be taken into account
+        Returns
+        ----------
+            edits: Iterator[str]
+                words obtained with two edits from the given word (a string may be generated more than once)
+    """
+
+    for one_edit in set(iter_one_letter_edits(word, allow_switch)):
+        if one_edit:
+            yield from iter_one_letter_edits(one_edit, allow_switch)
+
+
+def get_vocab(word_list: Iterable[str]) -> FrozenSet[str]:
+    """
+        Creates the hashed vocabulary of the naive engine, to be built once and reused by get_suggestions
+        Parameters
+        ----------
+            word_list: Iterable[str]
+                all words extracted from given a file
+        Returns
+        ----------
+            vocab: FrozenSet[str]
+                the distinct words
+    """
+
+    return frozenset(word_list)
+
+
+def get_suggestions(word: str, probs: Mapping[str, float], vocab: Collection[str],
                     verbose: bool = False, allow_switch: bool = False) -> list:
     """
-        Computes and returns a list of n possible suggestions tuple and their probabilities
+        Computes and returns a list of n possible suggestions tuple and their probabilities.
+        The word itself is suggested if it is in the vocabulary, otherwise the vocabulary words one edit away,
+        otherwise the ones two edits away. Edits are generated lazily and looked up in the vocabulary one by one,
+        so the words two edits away are only generated when no word is one edit away
         Parameters
         ----------
             word: str
                 input to check for suggestion
-            probs: dict
+            probs: Mapping[str, float]
                 Maps each word to its probability in the corpus
-            vocab: list[str]
-                Vocabulary from which we will compare misspelled words
+            vocab: Collection[str]
+                Vocabulary from which we will compare misspelled words. Should be a set (see get_vocab) or a
+                mapping built once, other collections are copied into a set at each call
             verbose: bool
                 set to true if we want to see all the process
             allow_switch: bool
@@ -264,20 +340,25 @@ def get_suggestions(word: str, probs: dict, vocab: list[str],
         Returns
         ----------
             n_best: list
-                Tuples with most probable n corrected words and their probabilities
+                Tuples with most probable n corrected words and their probabilities, equally probable words
+                being sorted alphabetically
     """
 
+    if not isinstance(vocab, (AbstractSet, Mapping)):
+        vocab = frozenset(vocab)
+
     word = compound_sound_transformation(word)
 
     # Creates suggestions
-    suggestions = set(
-        (word in vocab and word) or
-        edit_one_letter(word, verbose=verbose, allow_switch=allow_switch).intersection(vocab) or
-        edit_two_letters(word, verbose=verbose, allow_switch=allow_switch).intersection(vocab)
-    )
+    if word in vocab:
+        suggestions = {word}
+    else:
+        suggestions = {edit for edit in iter_one_letter_edits(word, allow_switch) if edit in vocab}
+        if not suggestions:
+            suggestions = {edit for edit in iter_two_letter_edits(word, allow_switch) if edit in vocab}
 
     # Get the best words and return the top n_suggested words as n_best
-    n_best = [(str(s), float(probs[s])) for s in list(suggestions) if s in probs]
+    n_best = [(s, float(probs[s])) for s in sorted(suggestions) if s in probs]
     n_best.sort(key=lambda item: item[1], reverse=True)
 
     # return same word if set is empty
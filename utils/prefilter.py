@@ -0,0 +1,163 @@
+"""
+prefilter
+-----
+Cheap lower bounds of the weighted edit distance, used to discard lexicon words before any dynamic programming.
+Inserting or deleting a letter costs 1 and replacing a letter costs 2, unless the letters are paired in
+COST_MATRIX in which case they are folded together (see symspell.fold_letters). Every edit therefore costs at
+least as much as it changes each of the following signatures, which are lower bounds of the distance:
+    - the length difference of the words,
+    - the number of folded letters present in only one of the words (bitmask),
+    - the L1 distance between the histograms of folded letters.
+The lexicon is indexed by word length with these signatures, and every trie node with the length range and
+the letters of the words below it
+Contents:
+    letter_mask,
+    letter_histogram,
+    histogram_distance,
+    popcount,
+    PrefilterIndex class
+"""
+
+from typing import Any, Dict, List, Tuple
+from utils.lexicon import Lexicon
+from utils.symspell import fold_letters
+from utils.wolof_rules import WOLOF_LETTERS
+
+# one bit per folded wolof letter, every other character shares the last bit (merging letters weakens the bound
+# but keeps it valid)
+LETTER_BITS = {letter: 1 << bit for bit, letter in enumerate(sorted(set(fold_letters(WOLOF_LETTERS))))}
+OTHER_BIT = 1 << len(LETTER_BITS)
+
+
+def letter_mask(word: str) -> int:
+    """
+        Bitmask of the folded letters of a word
+        Parameters
+        ----------
+            word: str
+                The preprocessed word
+        Returns
+        ----------
+            mask: int
+                The bits of the folded letters present in the word
+    """
+
+    mask = 0
+    for letter in fold_letters(word):
+        mask |= LETTER_BITS.get(letter, OTHER_BIT)
+    return mask
+
+
+def letter_histogram(word: str) -> Dict[str, int]:
+    """
+        Number of occurrences of each folded letter of a word
+        Parameters
+        ----------
+            word: str
+                The preprocessed word
+        Returns
+        ----------
+            histogram: Dict[str, int]
+                The count of each folded letter
+    """
+
+    histogram = {}
+    for letter in fold_letters(word):
+        histogram[letter] = histogram.get(letter, 0) + 1
+    return histogram
+
+
+def histogram_distance(source: Dict[str, int], target: Dict[str, int]) -> int:
+    """
+        L1 distance between two letter histograms, a lower bound of the weighted edit distance of their words
+        Parameters
+        ----------
+            source: Dict[str, int]
+                Histogram of the first word
+            target: Dict[str, int]
+                Histogram of the second word
+        Returns
+        ----------
+            distance: int
+                The sum of the absolute differences of the letter counts
+    """
+
+    distance = 0
+    for letter, count in source.items():
+        distance += abs(count - target.get(letter, 0))
+    for letter, count in target.items():
+        if letter not in source:
+            distance += count
+    return distance
+
+
+if hasattr(int, 'bit_count'):
+    # a C method: no Python frame in the hot loops of the engines
+    popcount = int.bit_count
+else:
+    def popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+
+class PrefilterIndex(object):
+
+    def __init__(self, lexicon: Lexicon) -> None:
+        """
+            Index the signatures of the processed words of a lexicon by length, and the bounds of every trie node
+            Parameters
+            ----------
+                lexicon: Lexicon
+                    The lexicon to index
+        """
+
+        dictionary = lexicon.dictionary
+        # processed words in trie order (their rank) and their actual words
+        self.processed_words: List[str] = []
+        self.actual_words: List[List[str]] = []
+        word_ids = {}
+        for processed_word, actual_word in dictionary.iter_entries():
+            word_id = word_ids.get(processed_word)
+            if word_id is None:
+                word_id = word_ids[processed_word] = len(self.processed_words)
+                self.processed_words.append(processed_word)
+                self.actual_words.append([])
+            self.actual_words[word_id].append(actual_word)
+
+        self.masks = [letter_mask(word) for word in self.processed_words]
+        self.histograms = [letter_histogram(word) for word in self.processed_words]
+        # word ids by length, in trie order
+        self.buckets: Dict[int, List[int]] = {}
+        for word_id, word in enumerate(self.processed_words):
+            self.buckets.setdefault(len(word), []).append(word_id)
+
+        self.node_bounds = self._node_bounds(dictionary)
+
+    @staticmethod
+    def _node_bounds(dictionary: Any) -> Dict[Any, Tuple[float, float, int]]:
+        """
+            (minimum length, maximum length, letter mask) of the words below every trie node, computed bottom-up
+        """
+
+        bounds = {}
+        stack = [(dictionary.root, 0, 0, False)]
+        while stack:
+            node, depth, path_mask, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, depth, path_mask, True))
+                for letter, child_node in dictionary.edges(node):
+                    stack.append((child_node, depth + 1,
+                                  path_mask | LETTER_BITS.get(fold_letters(letter), OTHER_BIT), False))
+                continue
+
+            if dictionary.words(node) is not None:
+                low, high, mask = depth, depth, path_mask
+            else:
+                low, high, mask = float('inf'), float('-inf'), 0
+            for _, child_node in dictionary.edges(node):
+                child_low, child_high, child_mask = bounds[child_node]
+                low = child_low if child_low < low else low
+                high = child_high if child_high > high else high
+                mask |= child_mask
+            bounds[node] = (low, high, mask)
+
+        return bounds
@@ -0,0 +1,136 @@
+"""
+rewriter
+-----
+A single-pass transducer equivalent to a cascade of literal substitutions applied one after the other,
+like `for k, v in rules: word = re.sub(k, v, word)`.
+Each substitution is a left-to-right rewriter buffering the text which may still match its pattern, so the
+cascade is a deterministic transducer whose state is the tuple of the buffers of every rule. States are numbered
+and the transitions of the transducer are built on first use then reused, so rewriting a word costs one
+table lookup per letter whatever the number of rules. Unlike a single longest-match alternation, the output of
+a rule can still be rewritten by the following rules (e.g. dio -> jo then ou -> u).
+Contents:
+    SequentialRewriter class,
+    rewrite
+"""
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+class SequentialRewriter(object):
+
+    def __init__(self, rules: Sequence[Tuple[str, str]], max_states: int = 1 << 14) -> None:
+        """
+            Parameters
+            ----------
+                rules: Sequence[Tuple[str, str]]
+                    The (pattern, replacement) literal substitutions in the order they are applied
+                max_states: int
+                    Maximum number of states kept in the transition tables, words reaching a new state
+                    once the tables are full are rewritten without the tables
+        """
+
+        if any(not pattern for pattern, _ in rules):
+            raise ValueError('Substitution patterns cannot be empty')
+
+        self.rules = list(rules)
+        self.max_states = max_states
+        initial_state = ('',) * len(self.rules)
+        self.states: List[Tuple[str, ...]] = [initial_state]
+        self.state_ids: Dict[Tuple[str, ...], int] = {initial_state: 0}
+        # transitions[state][letter] = (next state, output) and flushes[state] = output at the end of the word
+        self.transitions: List[Dict[str, Tuple[int, str]]] = [{}]
+        self.flushes: List[str] = ['']
+        self._lock = threading.Lock()
+
+    def _push(self, buffers: List[str], text: str, first_rule: int) -> str:
+        """
+            Feed text to the rules starting at `first_rule`, the output of each rule being fed to the next one
+        """
+
+        for index in range(first_rule, len(self.rules)):
+            if not text:
+                break
+            pattern, replacement = self.rules[index]
+            buffer = buffers[index]
+            output = []
+            for letter in text:
+                buffer += letter
+                if buffer == pattern:
+                    output.append(replacement)
+                    buffer = ''
+                else:
+                    # the pattern cannot match at the start of the buffer anymore: emit letters until it can
+                    while buffer and not pattern.startswith(buffer):
+                        output.append(buffer[0])
+                        buffer = buffer[1:]
+            buffers[index] = buffer
+            text = ''.join(output)
+
+        return text
+
+    def _state_id(self, buffers: List[str]) -> int:
+        state = tuple(buffers)
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = len(self.states)
+            self.states.append(state)
+            self.transitions.append({})
+            self.flushes.append(self._flush(list(state)))
+            self.state_ids[state] = state_id
+        return state_id
+
+    def _flush(self, buffers: List[str]) -> str:
+        """
+            Output of the cascade at the end of the word: the text buffered by each rule cannot match anymore,
+            it is emitted unchanged and fed to the following rules
+        """
+
+        output = []
+        for index in range(len(self.rules)):
+            pending, buffers[index] = buffers[index], ''
+            output.append(self._push(buffers, pending, index + 1))
+        return ''.join(output)
+
+    def _add_transition(self, state_id: int, letter: str) -> Tuple[int, str]:
+        with self._lock:
+            transition = self.transitions[state_id].get(letter)
+            if transition is None:
+                buffers = list(self.states[state_id])
+                output = self._push(buffers, letter, 0)
+                transition = (self._state_id(buffers), output)
+                self.transitions[state_id][letter] = transition
+        return transition
+
+    def _rewrite_uncompiled(self, word: str) -> str:
+        buffers = [''] * len(self.rules)
+        return self._push(buffers, word, 0) + self._flush(buffers)
+
+    def rewrite(self, word: str) -> str:
+        """
+            Apply all the substitutions to a word in a single pass
+            Parameters
+            ----------
+                word: str
+                    word which will be rewritten
+            Returns
+            ----------
+                rewritten_word: str
+                    The word after all the substitutions
+        """
+
+        transitions = self.transitions
+        state_id = 0
+        output = []
+        for letter in word:
+            transition = transitions[state_id].get(letter)
+            if transition is None:
+                if len(self.states) >= self.max_states:
+                    return self._rewrite_uncompiled(word)
+                transition = self._add_transition(state_id, letter)
+            state_id, piece = transition
+            if piece:
+                output.append(piece)
+        output.append(self.flushes[state_id])
+
+        return ''.join(output)
@@ -0,0 +1,53 @@
+"""
+search_stats
+-----
+Counters of the trie searches of the corrector, filled when a SearchStats object is given to get_suggestions.
+A SearchStats can be reused over many queries to aggregate them, or created per query to find the slow ones
+Contents:
+    SearchStats class
+"""
+
+
+class SearchStats(object):
+
+    def __init__(self) -> None:
+        # number of get_suggestions calls and of trie walks (top_n searches walk the trie once per radius)
+        self.queries = 0
+        self.searches = 0
+        self.nodes_visited = 0
+        self.dp_cells = 0
+        # children of visited nodes which were not explored because the row minimum exceeded the bound
+        self.pruned_subtrees = 0
+        self.candidates = 0
+        # trie nodes or lexicon words discarded by a lower bound (length difference, missing letters or letter
+        # histogram) before any dynamic programming
+        self.length_pruned = 0
+        self.mask_pruned = 0
+        self.histogram_pruned = 0
+        self.elapsed = 0.0
+
+    def add_search(self, nodes_visited: int, dp_cells: int, pruned_subtrees: int, candidates: int,
+                   length_pruned: int = 0, mask_pruned: int = 0, histogram_pruned: int = 0) -> None:
+        self.searches += 1
+        self.nodes_visited += nodes_visited
+        self.dp_cells += dp_cells
+        self.pruned_subtrees += pruned_subtrees
+        self.candidates += candidates
+        self.length_pruned += length_pruned
+        self.mask_pruned += mask_pruned
+        self.histogram_pruned += histogram_pruned
+
+    def __add__(self, other: 'SearchStats') -> 'SearchStats':
+        total = SearchStats()
+        for name, value in vars(self).items():
+            setattr(total, name, value + getattr(other, name))
+        return total
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return 'SearchStats(queries={}, searches={}, nodes_visited={}, dp_cells={}, pruned_subtrees={}, ' \
+               'candidates={}, length_pruned={}, mask_pruned={}, histogram_pruned={}, elapsed={:.6f}s)'.format(
+                   self.queries, self.searches, self.nodes_visited, self.dp_cells, self.pruned_subtrees,
+                   self.candidates, self.length_pruned, self.mask_pruned, self.histogram_pruned, self.elapsed)
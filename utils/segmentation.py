@@ -0,0 +1,145 @@
+"""
+segmentation
+-----
+Segmentation of run-together words (missing spaces, e.g. "dajaleak" -> "dajale ak") with the lexicon trie.
+The lexicon words starting at every position of a token are found by walking the trie from that position, which
+takes O(n^2) trie steps for a token of n letters. A memoized dynamic program over the split points then picks the
+cheapest split: each segment costs a missing space, short words and the letters of unknown segments (covered by no
+lexicon word) cost extra. The unknown segments are then corrected on their own with a small fuzzy search, instead
+of correcting the whole token with a large distance
+Contents:
+    Segmenter class,
+    word_ends,
+    segment
+"""
+
+from typing import List, Optional, Tuple
+from utils.helper import word_preprocessing
+from utils.weighted_levenshtein import Corrector
+
+MIN_SEGMENT_LENGTH = 2
+MAX_SEGMENTS = 4
+# costs of a split: every segment costs a missing space. The many two-letter lexicon words match by chance inside
+# misspelled words, and every letter of an unknown segment needs a correction
+SEGMENT_COST = 1.0
+SHORT_WORD_LENGTH = 3
+SHORT_WORD_COST = 0.5
+UNKNOWN_LETTER_COST = 0.3
+
+
+class Segmenter(Corrector):
+
+    def word_ends(self, processed_word: str, min_length: int = MIN_SEGMENT_LENGTH) -> List[List[int]]:
+        """
+            Find the lexicon words contained in a word, by walking the trie from every position
+            Parameters
+            ----------
+                processed_word: str
+                    The preprocessed word
+                min_length: int
+                    The minimum length of the words found
+            Returns
+            ----------
+                ends: List[List[int]]
+                    ends[i] lists the positions j, in decreasing order, such that processed_word[i:j] is in the
+                    lexicon
+        """
+
+        dictionary = self.dictionary
+        child, words = dictionary.child, dictionary.words
+        n = len(processed_word)
+        ends = []
+        for start in range(n):
+            node = dictionary.root
+            found = []
+            for end in range(start, n):
+                node = child(node, processed_word[end])
+                if node is None:
+                    break
+                if end + 1 - start >= min_length and words(node) is not None:
+                    found.append(end + 1)
+            found.reverse()
+            ends.append(found)
+        return ends
+
+    def segment(self, word: str, min_length: int = MIN_SEGMENT_LENGTH,
+                max_segments: int = MAX_SEGMENTS, unknown_segments: bool = True,
+                max_short_words: Optional[int] = None) -> Optional[List[str]]:
+        """
+            Split a run-together word into lexicon words
+            Parameters
+            ----------
+                word: str
+                    The word to split
+                min_length: int
+                    The minimum length of a segment
+                max_segments: int
+                    The maximum number of segments
+                unknown_segments: bool
+                    Allow segments which are not lexicon words, corrected on their own
+                max_short_words: Optional[int]
+                    The maximum number of lexicon words shorter than SHORT_WORD_LENGTH, None for no limit
+            Returns
+            ----------
+                segments: Optional[List[str]]
+                    The lexicon words of the cheapest split, None if it has a single segment or more than
+                    max_segments, too many short words, if unknown segments hold more than half of the letters or if
+                    an unknown segment has no correction
+        """
+
+        processed_word = word_preprocessing(word)
+        n = len(processed_word)
+        if n < 2 * min_length:
+            return None
+
+        ends = self.word_ends(processed_word, min_length)
+        # best[i][after_unknown] = (cost, next split point, is known) of the cheapest split of processed_word[i:],
+        # two unknown segments never following each other
+        best: List[List[Optional[Tuple[float, int, bool]]]] = [[None, None] for _ in range(n + 1)]
+        best[n] = [(0.0, n, True), (0.0, n, True)]
+        for start in range(n - 1, -1, -1):
+            for after_unknown in (False, True):
+                choice = None
+                # the longest words come first and win the ties
+                for end in ends[start]:
+                    rest = best[end][False]
+                    if rest is not None:
+                        cost = rest[0] + SEGMENT_COST + (SHORT_WORD_COST if end - start < SHORT_WORD_LENGTH else 0)
+                        if choice is None or cost < choice[0]:
+                            choice = (cost, end, True)
+                if unknown_segments and not after_unknown:
+                    for end in range(n, start + min_length - 1, -1):
+                        rest = best[end][True]
+                        if rest is not None:
+                            cost = rest[0] + SEGMENT_COST + UNKNOWN_LETTER_COST * (end - start)
+                            if choice is None or cost < choice[0]:
+                                choice = (cost, end, False)
+                best[start][after_unknown] = choice
+
+        if best[0][False] is None:
+            return None
+        pieces = []
+        start, after_unknown = 0, False
+        while start < n:
+            _, end, is_known = best[start][after_unknown]
+            pieces.append((processed_word[start:end], is_known))
+            start, after_unknown = end, not is_known
+
+        unknown_letters = sum(len(piece) for piece, is_known in pieces if not is_known)
+        if not 2 <= len(pieces) <= max_segments or 2 * unknown_letters > n:
+            return None
+        if max_short_words is not None and max_short_words < sum(
+                is_known and len(piece) < SHORT_WORD_LENGTH for piece, is_known in pieces):
+            return None
+
+        segments = []
+        for piece, is_known in pieces:
+            if is_known:
+                segments.append(self.dictionary.lookup(piece)[0])
+                continue
+            # a small radius: the segment is short and its boundaries are guessed
+            suggestions = self.get_suggestions(piece, max(1, len(piece) // 4), top_n=1)
+            if not suggestions:
+                return None
+            segments.append(suggestions[0][0])
+        return segments
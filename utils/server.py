@@ -0,0 +1,333 @@
+"""
+server
+-----
+A local HTTP/JSON correction service keeping a warm spell checker in memory.
+Concurrent requests to the same endpoint are gathered into small batches which are run in a worker pool, as many
+batches at once as there are workers, so the event loop keeps accepting requests while words are checked and
+corrected.
+Endpoints (POST, JSON body):
+    /check    {"words": ["...", ...]}               -> {"results": [true, false, ...]}
+    /suggest  {"words": ["...", ...], "top_n": 5}   -> {"results": [[["word", distance], ...], ...]}
+    /correct  {"text": "..."}                       -> {"text": "..."}
+    /stats    (GET)                                 -> request, batch and token cache counters (summed over the workers)
+With a LexiconReloader, every process running batches polls the lexicon files before a batch and swaps in the
+updated lexicon, so forked workers pick up lexicon fixes without a restart.
+Contents:
+    CorrectionServer class,
+    serve
+"""
+
+import asyncio
+import functools
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from utils.cache import CacheStats
+from utils.lexicon_reloader import LexiconReloader
+from utils.spellchecker import SpellChecker
+
+MAX_BATCH_SIZE = 32
+MAX_BATCH_DELAY = 0.002
+MAX_BODY_SIZE = 1 << 20
+
+# spell checker used by the batches, inherited by forked worker processes
+_spellchecker: Optional[SpellChecker] = None
+_reloader: Optional[LexiconReloader] = None
+
+
+def _process_batch(endpoint: str, payloads: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int, CacheStats]:
+    """
+        Answer a batch of requests to the same endpoint, with the process id and the token cache counters of the
+        process which answered it
+    """
+
+    if _reloader is not None:
+        _reloader.poll()
+    spellchecker = _spellchecker
+    if endpoint == '/check':
+        results = [{'results': [spellchecker.check(word) for word in payload['words']]} for payload in payloads]
+    elif endpoint == '/suggest':
+        results = [{'results': [spellchecker.suggest(word, payload.get('top_n', 5)) for word in payload['words']]}
+                   for payload in payloads]
+    else:
+        results = [{'text': spellchecker.correct_line(payload['text'])} for payload in payloads]
+    return results, os.getpid(), spellchecker.cache_stats
+
+
+def _init_worker() -> None:
+    # the pending writes of the suggestion cache of a forked worker are committed when the worker exits
+    suggestion_cache = _spellchecker.suggestion_cache if _spellchecker is not None else None
+    if suggestion_cache is not None:
+        multiprocessing.util.Finalize(None, suggestion_cache.close, exitpriority=0)
+
+
+def _validate(endpoint: str, payload: Any) -> None:
+    if not isinstance(payload, dict):
+        raise ValueError('the request body must be a JSON object')
+    if endpoint in ('/check', '/suggest'):
+        words = payload.get('words')
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            raise ValueError('"words" must be a list of strings')
+        top_n = payload.get('top_n', 5)
+        if endpoint == '/suggest' and top_n is not None and (not isinstance(top_n, int) or isinstance(top_n, bool)):
+            raise ValueError('"top_n" must be an integer')
+    elif not isinstance(payload.get('text'), str):
+        raise ValueError('"text" must be a string')
+
+
+class _Batcher(object):
+
+    def __init__(self, endpoint: str, server: 'CorrectionServer') -> None:
+        self.endpoint = endpoint
+        self.server = server
+        self.queue: 'asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future]]' = asyncio.Queue()
+        # the running batches, kept referenced until they finish
+        self.batch_tasks = set()
+        self.task = asyncio.ensure_future(self._run())
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # wait for a first request then gather the requests arriving shortly after it
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.server.max_batch_delay
+            while len(batch) < self.server.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # the requests arriving while every worker is busy are gathered into the next batch
+            await self.server.batch_slots.acquire()
+            self.server.batches += 1
+            self.server.batched_requests += len(batch)
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        payloads = [payload for payload, _ in batch]
+        try:
+            results, pid, cache_stats = await asyncio.get_running_loop().run_in_executor(
+                self.server.executor, _process_batch, self.endpoint, payloads)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            self.server.worker_cache_stats[pid] = cache_stats
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.server.batch_slots.release()
+
+
+class CorrectionServer(object):
+
+    def __init__(self, spellchecker: Optional[SpellChecker] = None, host: str = '127.0.0.1', port: int = 8080,
+                 workers: int = 0, max_batch_size: int = MAX_BATCH_SIZE,
+                 max_batch_delay: float = MAX_BATCH_DELAY, reloader: Optional[LexiconReloader] = None) -> None:
+        """
+            Parameters
+            ----------
+                spellchecker: Optional[SpellChecker]
+                    The warm spell checker answering the requests, a default SpellChecker is created if None
+                host: str
+                    The address to listen on, only local clients are expected
+                port: int
+                    The port to listen on, 0 for any free port
+                workers: int
+                    The number of forked worker processes running the batches (sharing the lexicon index
+                    copy-on-write), 0 runs them in a single background thread of this process
+                max_batch_size: int
+                    The maximum number of requests gathered in a batch
+                max_batch_delay: float
+                    The maximum time (seconds) waited for other requests after the first request of a batch
+                reloader: Optional[LexiconReloader]
+                    Hot reload of the lexicon of `spellchecker`, polled before every batch
+        """
+
+        global _spellchecker, _reloader
+        _spellchecker = spellchecker if spellchecker is not None else SpellChecker()
+        _reloader = reloader
+        self.spellchecker = _spellchecker
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.executor: Optional[Executor] = None
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        # token cache counters of the processes running the batches, by process id
+        self.worker_cache_stats: Dict[int, CacheStats] = {}
+        self.batch_slots: Optional[asyncio.Semaphore] = None
+        self._batchers: Dict[str, _Batcher] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """
+            Start listening, `port` is updated with the actual port when it was 0
+        """
+
+        if self.workers > 0 and 'fork' in multiprocessing.get_all_start_methods():
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'),
+                                                initializer=_init_worker)
+            # the workers are forked before any connection is accepted, otherwise they would inherit the client
+            # sockets and keep them open after the server closes them
+            await asyncio.get_running_loop().run_in_executor(self.executor, os.getpid)
+        else:
+            self.executor = ThreadPoolExecutor(max(self.workers, 1))
+        self.batch_slots = asyncio.Semaphore(max(self.workers, 1))
+        self._batchers = {endpoint: _Batcher(endpoint, self) for endpoint in ('/check', '/suggest', '/correct')}
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+            Stop listening and wait for the running batches, then commit the pending writes of the suggestion cache
+        """
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self._batchers.values():
+            batcher.task.cancel()
+        if self.executor is not None:
+            # worker processes commit their own suggestion cache when they exit, see _init_worker
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.executor.shutdown, wait=True, cancel_futures=True))
+        batch_tasks = [task for batcher in self._batchers.values() for task in batcher.batch_tasks]
+        await asyncio.gather(*batch_tasks, return_exceptions=True)
+        suggestion_cache = self.spellchecker.suggestion_cache
+        if suggestion_cache is not None:
+            suggestion_cache.close()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        # the token caches of the processes which answered the batches, the one of this process when it runs them
+        cache_stats = sum(self.worker_cache_stats.values(), CacheStats())
+        return {'requests': self.requests, 'batches': self.batches,
+                'mean_batch_size': self.batched_requests / self.batches if self.batches else 0.0,
+                'token_cache': {'hits': cache_stats.hits, 'misses': cache_stats.misses,
+                                'evictions': cache_stats.evictions}}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header_line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get('connection', '').lower() != 'close' and
+                              (version != 'HTTP/1.0' or headers.get('connection', '').lower() == 'keep-alive'))
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, keep_alive=False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, response = await self._dispatch(method, path, body)
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # the server is shutting down while the client keeps its connection open
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        self.requests += 1
+        if path == '/stats' and method == 'GET':
+            return 200, self.stats
+        if path not in self._batchers:
+            return 404, {'error': 'unknown endpoint {}'.format(path)}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            payload = json.loads(body.decode('utf-8'))
+            _validate(path, payload)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        try:
+            return 200, await self._batchers[path].submit(payload)
+        except Exception as error:
+            return 500, {'error': str(error)}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, response: Dict[str, Any], keep_alive: bool) -> None:
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   413: 'Payload Too Large', 500: 'Internal Server Error'}
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        head = ('HTTP/1.1 {} {}\r\nContent-Type: application/json; charset=utf-8\r\nContent-Length: {}\r\n'
+                'Connection: {}\r\n\r\n').format(status, reasons[status], len(body),
+                                                 'keep-alive' if keep_alive else 'close')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def serve(spellchecker: Optional[SpellChecker] = None, host: str = '127.0.0.1', port: int = 8080,
+          workers: int = 0, reloader: Optional[LexiconReloader] = None) -> None:
+    """
+        Run a correction server until interrupted
+        Parameters
+        ----------
+            spellchecker: Optional[SpellChecker]
+                The warm spell checker answering the requests
+            host: str
+                The address to listen on
+            port: int
+                The port to listen on
+            workers: int
+                The number of forked worker processes running the batches, 0 for a background thread
+            reloader: Optional[LexiconReloader]
+                Hot reload of the lexicon of `spellchecker`
+    """
+
+    server = CorrectionServer(spellchecker, host, port, workers, reloader=reloader)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
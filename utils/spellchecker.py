@@ -0,0 +1,259 @@
+"""
+spellchecker
+-----
+The spell checker class gathering the detection and correction of wolof words behind a single object.
+The lexicon index is built once and shared, so a SpellChecker can be created once in a long-running process
+and called millions of times. Suggestions can also be kept from run to run in a persistent SuggestionCache.
+Optionally, a misspelled word without a close correction is split into lexicon words, so that words written
+together ("dajaleak" -> "dajale ak") are separated instead of replaced with a distant word
+Contents:
+    SpellChecker class,
+    check,
+    suggest,
+    correct_word,
+    correct_line,
+    correct_lines,
+    correct_batch,
+    set_lexicon
+"""
+
+from typing import Iterable, Iterator, List, Optional
+from utils.cache import CacheStats, LRUCache
+from utils.detection import Detector
+from utils.helper import fr_en_word, fr_en_words, tokenize, word_preprocessing
+from utils.lexicon import Lexicon, load_lexicon, lex_filepath
+from utils.segmentation import Segmenter
+from utils.suggestion_cache import SuggestionCache, lexicon_version
+from utils.weighted_levenshtein import Corrector
+from utils.wolof_rules import compound_sound_transformation
+
+TOKEN_CACHE_SIZE = 1 << 17
+# with segmentation, a misspelled word with a suggestion within CLOSE_DISTANCE is corrected without being split,
+# unless the suggestion is farther than EXACT_SPLIT_DISTANCE and the word is two lexicon words written together
+CLOSE_DISTANCE = 2
+EXACT_SPLIT_DISTANCE = 1
+
+
+class SpellChecker(object):
+
+    def __init__(self, lexicon_filepath: str = lex_filepath, lexicon: Optional[Lexicon] = None,
+                 max_distance: int = 5, cache_size: int = TOKEN_CACHE_SIZE, engine: str = 'dp',
+                 suggestion_cache: Optional[SuggestionCache] = None, segment: bool = False) -> None:
+        """
+            Parameters
+            ----------
+                lexicon_filepath: str
+                    Path of the lexicon file, defaults to the wolof lexicon shipped with the package
+                lexicon: Optional[Lexicon]
+                    An already built lexicon index, used instead of `lexicon_filepath`
+                max_distance: int
+                    The maximum distance between a misspelled word and its suggestions
+                cache_size: int
+                    The number of distinct tokens whose correction is memoized, 0 disables the cache
+                engine: str
+                    The search engine of the corrector, see Corrector.get_suggestions
+                suggestion_cache: Optional[SuggestionCache]
+                    A persistent cache of the suggestions, opened with the version of this lexicon
+                segment: bool
+                    Split the misspelled words without a close correction into lexicon words, see
+                    utils.segmentation. Off by default: it corrects words written together, but splits some
+                    misspellings of single words
+        """
+
+        self.lexicon = lexicon if lexicon is not None else load_lexicon(lexicon_filepath)
+        self.detector = Detector(self.lexicon)
+        self.corrector = Corrector(self.lexicon)
+        self.segmenter = Segmenter(self.lexicon) if segment else None
+        self.max_distance = max_distance
+        self.engine = engine
+        self.cache = LRUCache(cache_size)
+        self.suggestion_cache = suggestion_cache
+
+    def check(self, word: str) -> bool:
+        """
+            Check if a word is correctly written, i.e. is a valid wolof word or a French or English word
+            Parameters
+            ----------
+                word: str
+                    Word that will be checked
+            Returns
+            -------
+                is_correct: bool
+                    True if the word does not need to be corrected
+        """
+
+        # known wolof words never reach the (much slower) language identification
+        return self.detector.checker(word) or fr_en_word(word)
+
+    def suggest(self, word: str, top_n: Optional[int] = 5) -> List[tuple]:
+        """
+            Get the best suggestions for a word
+            Parameters
+            ----------
+                word: str
+                    The word for which we want suggestions
+                top_n: Optional[int]
+                    The number of suggestions, None for all the suggestions within `max_distance`
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The word suggestions with their corresponding distances
+        """
+
+        if self.suggestion_cache is None:
+            return self.corrector.get_suggestions(word, self.max_distance, top_n, engine=self.engine)
+
+        key = self._suggestion_key(word, top_n)
+        suggestions = self.suggestion_cache.get(key)
+        if suggestions is None:
+            suggestions = self.corrector.get_suggestions(word, self.max_distance, top_n, engine=self.engine)
+            self.suggestion_cache.put(key, suggestions)
+        return suggestions
+
+    def _suggestion_key(self, word: str, top_n: Optional[int]) -> str:
+        # the suggestions only depend on the preprocessed word
+        preprocessed_word = compound_sound_transformation(word_preprocessing(word))
+        return SuggestionCache.key(preprocessed_word, self.engine, self.max_distance, top_n)
+
+    def _correct_word(self, word: str) -> str:
+        # the correction of a word which is not a wolof word, once it is known not to be French or English either
+        if '-' in word:
+            # the parts of a misspelled compound are corrected one by one, keeping its hyphens
+            return '-'.join(self.correct_word(part) for part in word.split('-'))
+
+        suggestions = self.suggest(word, top_n=1)
+        distance = suggestions[0][1] if suggestions else float('inf')
+        segmenter = self.segmenter
+        # a close correction wins over a split, a split over a distant correction. "dajaleak" is "dajale" with two
+        # letters deleted, but the exact split "dajale ak" wins over it
+        if segmenter is not None and distance > EXACT_SPLIT_DISTANCE:
+            segments = segmenter.segment(word, max_segments=2, unknown_segments=False, max_short_words=1)
+            if segments is None and distance > CLOSE_DISTANCE:
+                segments = segmenter.segment(word)
+            if segments is not None:
+                return ' '.join(segments)
+
+        if suggestions:
+            return suggestions[0][0]
+        return word
+
+    def correct_word(self, word: str) -> str:
+        """
+            Keep a word if it is correctly written, otherwise replace it with its best suggestion
+            Parameters
+            ----------
+                word: str
+                    The word to correct
+            Returns
+            ----------
+                corrected_word: str
+                    The given word or its correction
+        """
+
+        if self.check(word):
+            return word
+        return self.cache.get_or_compute(word, self._correct_word)
+
+    def correct_line(self, line: str) -> str:
+        """
+            Correct the misspelled words of a line. Only the misspelled words are replaced: the spacing, the
+            punctuation and the line ending are kept as they are (see utils.helper.tokenize). The words which are not
+            wolof words are kept when, taken together, they are French or English (see utils.helper.fr_en_words)
+            Parameters
+            ----------
+                line: str
+                    The line to correct, with or without its line ending
+            Returns
+            ----------
+                corrected_line: str
+                    The line with its misspelled words replaced, the given line itself when no word is replaced
+        """
+
+        detector_checker = self.detector.checker
+        tokens = [token for token in tokenize(line) if not detector_checker(token[2])]
+        # the words which are not wolof words go through a single language identification for the whole line
+        if not tokens or fr_en_words(word for _, _, word in tokens):
+            return line
+
+        pieces = None
+        end = 0
+        for start, word_end, word in tokens:
+            corrected_word = self.cache.get_or_compute(word, self._correct_word)
+            if corrected_word == word:
+                continue
+            # the pieces are only built once a word is replaced, clean lines are returned without any copy
+            if pieces is None:
+                pieces = []
+            pieces.append(line[end:start])
+            pieces.append(corrected_word)
+            end = word_end
+
+        if pieces is None:
+            return line
+        pieces.append(line[end:])
+        return ''.join(pieces)
+
+    def correct_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+            Lazily correct a stream of lines, keeping their line endings
+            Parameters
+            ----------
+                lines: Iterable[str]
+                    The lines to correct, with their line endings
+            Returns
+            ----------
+                corrected_lines: Iterator[str]
+                    The corrected lines, with their line endings
+        """
+
+        for line in lines:
+            yield self.correct_line(line)
+
+    def correct_batch(self, lines: List[str]) -> List[str]:
+        """
+            Correct a batch of lines. With a persistent suggestion cache, the suggestions of the tokens of the batch
+            are loaded at once beforehand and the new ones are written at once afterwards
+            Parameters
+            ----------
+                lines: List[str]
+                    The lines to correct, with their line endings
+            Returns
+            ----------
+                corrected_lines: List[str]
+                    The corrected lines, with their line endings
+        """
+
+        if self.suggestion_cache is None:
+            return list(self.correct_lines(lines))
+
+        # the wolof words and the tokens already corrected in memory do not need their suggestions
+        detector_checker = self.detector.checker
+        words = {word for line in lines for _, _, word in tokenize(line)
+                 if word not in self.cache and not detector_checker(word)}
+        self.suggestion_cache.prefetch(self._suggestion_key(word, 1) for word in words)
+        corrected_lines = list(self.correct_lines(lines))
+        self.suggestion_cache.flush()
+        return corrected_lines
+
+    def set_lexicon(self, lexicon: Lexicon) -> None:
+        """
+            Swap in another lexicon index (e.g. an updated one, see Lexicon.updated and utils.lexicon_reloader).
+            The calls already running finish with the previous index, the next calls use the new one.
+            The token cache is cleared and the persistent suggestion cache switches to the version of the new index
+            Parameters
+            ----------
+                lexicon: Lexicon
+                    The new lexicon index
+        """
+
+        detector, corrector = Detector(lexicon), Corrector(lexicon)
+        segmenter = Segmenter(lexicon) if self.segmenter is not None else None
+        self.detector, self.corrector, self.segmenter = detector, corrector, segmenter
+        self.lexicon = lexicon
+        self.cache.clear()
+        if self.suggestion_cache is not None:
+            self.suggestion_cache.set_version(lexicon_version(lexicon))
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        return self.cache.stats
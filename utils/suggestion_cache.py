@@ -0,0 +1,282 @@
+"""
+suggestion_cache
+-----
+A persistent cache of the suggestions of the corrector, stored in a SQLite database so that it survives the process.
+Entries are keyed by the preprocessed word, the engine and the search parameters. The database records the version
+of the lexicon and of COST_MATRIX it was filled with (a content hash): opening it with another version empties it,
+so editing the lexicon invalidates the cache automatically.
+Writes are buffered and committed by batches (every FLUSH_SIZE entries or FLUSH_INTERVAL seconds), the least
+recently used entries are evicted beyond `max_entries`.
+A database is meant for one lexicon: processes sharing it with different lexicons keep emptying it
+Contents:
+    lexicon_version,
+    SuggestionCache class
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from utils.cache import CacheStats
+from utils.helper import COST_MATRIX
+from utils.lexicon import Lexicon
+
+# bumped when the suggestions computed for the same lexicon change (e.g. a new ranking)
+CACHE_FORMAT = 1
+SUGGESTION_CACHE_SIZE = 1 << 20
+FLUSH_SIZE = 256
+FLUSH_INTERVAL = 5.0
+# maximum number of parameters of a SQLite statement in old versions
+_SQL_VARIABLES = 999
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS suggestions (key TEXT PRIMARY KEY, suggestions TEXT NOT NULL, last_used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS suggestions_last_used ON suggestions (last_used);
+"""
+
+
+def lexicon_version(lexicon: Lexicon) -> str:
+    """
+        Content hash of a lexicon and of the costs of the weighted edit distance
+        Parameters
+        ----------
+            lexicon: Lexicon
+                The lexicon index, hashed through its file if it was read from one
+        Returns
+        ----------
+            version: str
+                The hexadecimal sha256 digest
+    """
+
+    digest = hashlib.sha256()
+    digest.update('format {}\n'.format(CACHE_FORMAT).encode('utf-8'))
+    digest.update(json.dumps(sorted(COST_MATRIX.items()), ensure_ascii=False).encode('utf-8'))
+    if lexicon.filepath is not None:
+        with open(lexicon.filepath, 'rb') as f:
+            digest.update(f.read())
+    else:
+        for processed_word, actual_word in lexicon.dictionary.iter_entries():
+            digest.update('{}\t{}\n'.format(processed_word, actual_word).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SuggestionCache(object):
+
+    def __init__(self, filepath: str, version: str, max_entries: int = SUGGESTION_CACHE_SIZE) -> None:
+        """
+            Parameters
+            ----------
+                filepath: str
+                    Path of the SQLite database, created if it does not exist
+                version: str
+                    The version of the lexicon (see `lexicon_version`), the entries of another version are deleted
+                max_entries: int
+                    Maximum number of entries of the database, the least recently used ones are evicted beyond it
+        """
+
+        self.filepath = filepath
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # keys of the last `prefetch` and the entries found, pending writes and keys whose last use is not written yet
+        self._prefetched_keys = set()
+        self._prefetched: Dict[str, List[tuple]] = {}
+        self._pending: Dict[str, List[tuple]] = {}
+        self._touched = set()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+            The connection of the current process. SQLite connections must not be used across a fork, so forked
+            workers open their own
+        """
+
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+
+        # shared by the threads of a server, the lock serializes them
+        connection = sqlite3.connect(self.filepath, timeout=30, check_same_thread=False)
+        # readers do not block the writer of another process
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            connection.executescript(_SCHEMA)
+        self._check_version(connection)
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def _check_version(self, connection: sqlite3.Connection) -> None:
+        with connection:
+            row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                connection.execute('DELETE FROM suggestions')
+                connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)",
+                                   (self.version,))
+        self._size = connection.execute('SELECT COUNT(*) FROM suggestions').fetchone()[0]
+
+    def set_version(self, version: str) -> None:
+        """
+            Switch to another version of the lexicon (e.g. after a hot reload), emptying the database if it was
+            filled with another version. The pending entries of the previous version are dropped
+            Parameters
+            ----------
+                version: str
+                    The new version, see `lexicon_version`
+        """
+
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            self._prefetched_keys = set()
+            self._prefetched = {}
+            self.version = version
+            self._check_version(self._connect())
+
+    @staticmethod
+    def key(preprocessed_word: str, engine: str, max_distance: float, top_n: Optional[int]) -> str:
+        return json.dumps([preprocessed_word, engine, max_distance, top_n], ensure_ascii=False)
+
+    @staticmethod
+    def _decode(suggestions: str) -> List[tuple]:
+        # json keeps the int or float type of the distances
+        return [tuple(suggestion) for suggestion in json.loads(suggestions)]
+
+    def prefetch(self, keys: Iterable[str]) -> int:
+        """
+            Load the entries of a batch of keys with a few queries, so that their `get`, hit or miss, does not
+            query the database. The entries of the previous prefetch are dropped
+            Parameters
+            ----------
+                keys: Iterable[str]
+                    The keys of the batch, see `key`
+            Returns
+            ----------
+                found: int
+                    The number of keys in the cache
+        """
+
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            connection = self._connect()
+            self._prefetched_keys = set(keys)
+            self._prefetched = {}
+            for start in range(0, len(keys), _SQL_VARIABLES):
+                chunk = keys[start:start + _SQL_VARIABLES]
+                rows = connection.execute('SELECT key, suggestions FROM suggestions WHERE key IN ({})'.format(
+                    ', '.join('?' * len(chunk))), chunk)
+                for key, suggestions in rows:
+                    self._prefetched[key] = self._decode(suggestions)
+            return len(self._prefetched)
+
+    def get(self, key: str) -> Optional[List[tuple]]:
+        """
+            Get the suggestions of a key
+            Parameters
+            ----------
+                key: str
+                    The key of the search, see `key`
+            Returns
+            ----------
+                suggestions: Optional[List[tuple]]
+                    The cached suggestions, None on a miss
+        """
+
+        with self._lock:
+            suggestions = self._pending.get(key)
+            if suggestions is None:
+                suggestions = self._prefetched.get(key)
+            if suggestions is None and key not in self._prefetched_keys:
+                row = self._connect().execute('SELECT suggestions FROM suggestions WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    suggestions = self._decode(row[0])
+            if suggestions is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched.add(key)
+            self._flush_if_due()
+            return suggestions
+
+    def put(self, key: str, suggestions: List[tuple]) -> None:
+        """
+            Store the suggestions of a key, written with the next `flush` (automatic every FLUSH_SIZE entries or
+            FLUSH_INTERVAL seconds)
+            Parameters
+            ----------
+                key: str
+                    The key of the search, see `key`
+                suggestions: List[tuple]
+                    Its suggestions
+        """
+
+        with self._lock:
+            self._pending[key] = suggestions
+            self._flush_if_due()
+
+    def flush(self) -> None:
+        """
+            Write the pending entries and last uses in a single transaction, then evict the least recently used
+            entries beyond `max_entries`
+        """
+
+        with self._lock:
+            self._flush()
+
+    def _flush_if_due(self) -> None:
+        # the last uses are bounded like the pending entries
+        if (len(self._pending) >= FLUSH_SIZE or len(self._touched) >= FLUSH_SIZE or
+                ((self._pending or self._touched) and time.monotonic() - self._last_flush >= FLUSH_INTERVAL)):
+            self._flush()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending and not self._touched:
+            return
+
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(
+                'INSERT OR IGNORE INTO suggestions (key, suggestions, last_used) VALUES (?, ?, ?)',
+                [(key, json.dumps(suggestions, ensure_ascii=False), now) for key, suggestions in self._pending.items()])
+            self._size += connection.total_changes - before
+            connection.executemany('UPDATE suggestions SET last_used = ? WHERE key = ?',
+                                   [(now, key) for key in self._touched])
+            if self._size > self.max_entries:
+                # other processes may have filled the database as well
+                self._size = connection.execute('SELECT COUNT(*) FROM suggestions').fetchone()[0]
+                excess = self._size - self.max_entries
+                if excess > 0:
+                    connection.execute('DELETE FROM suggestions WHERE key IN '
+                                       '(SELECT key FROM suggestions ORDER BY last_used LIMIT ?)', (excess,))
+                    self.evictions += excess
+                    self._size -= excess
+        self._pending.clear()
+        self._touched.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._flush()
+                self._connection.close()
+            self._connection = None
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions)
+
+    def __len__(self) -> int:
+        return self._size + len(self._pending)
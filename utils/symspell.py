@@ -0,0 +1,229 @@
+"""
+symspell
+-----
+The corrector class for suggesting words with a symmetric delete (SymSpell) index.
+Every lexicon word is indexed under all the strings obtained by deleting up to `max_index_distance` letters,
+so a lookup only generates the deletes of the searched word. Candidates are then ranked with the same
+weighted levenshtein distance as the trie Corrector.
+Letters which can be replaced at a reduced cost in COST_MATRIX (diacritics, x/q) are folded together before
+generating the deletes, so every word within weighted distance `max_distance` is a candidate.
+Contents:
+    fold_letters,
+    generate_deletes,
+    SymSpellIndex class,
+    search,
+    SymSpellCorrector class
+"""
+
+from typing import Dict, List, Optional, Set
+from utils.base import Base
+from utils.helper import COST_MATRIX, rank_filter, word_preprocessing, weighted_dynamic_levenshtein
+from utils.lexicon import Lexicon
+from utils.wolof_rules import compound_sound_transformation
+
+
+def _folding_map() -> Dict[str, str]:
+    """
+        Map every letter of COST_MATRIX to a representative of the letters it can be cheaply replaced with
+    """
+
+    groups: List[Set[str]] = []
+    for pair, cost in COST_MATRIX.items():
+        if cost >= 2:
+            continue
+        merged = set(pair)
+        for group in [group for group in groups if group & merged]:
+            merged |= group
+            groups.remove(group)
+        groups.append(merged)
+
+    return {letter: min(group) for group in groups for letter in group}
+
+
+FOLDING_MAP = str.maketrans(_folding_map())
+
+
+def fold_letters(word: str) -> str:
+    """
+        Replace the letters that can be cheaply replaced with each other by a single representative
+        Parameters
+        ----------
+            word: str
+                word which will be folded
+        Returns
+        ----------
+            folded_word: str
+                The folded word
+    """
+
+    return word.translate(FOLDING_MAP)
+
+
+def generate_deletes(word: str, max_distance: int) -> Set[str]:
+    """
+        Generate every string obtained by deleting up to `max_distance` letters of a word
+        Parameters
+        ----------
+            word: str
+                word for which we generate the deletes
+            max_distance: int
+                The maximum number of deleted letters
+        Returns
+        ----------
+            deletes: Set[str]
+                The word and all its deletes
+    """
+
+    deletes = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for current in frontier:
+            for i in range(len(current)):
+                delete = current[:i] + current[i + 1:]
+                if delete not in deletes:
+                    deletes.add(delete)
+                    next_frontier.append(delete)
+        frontier = next_frontier
+
+    return deletes
+
+
+class SymSpellIndex(object):
+
+    def __init__(self, lexicon: Lexicon, max_index_distance: int = 2) -> None:
+        """
+            Index the deletes of every processed word of a lexicon
+            Parameters
+            ----------
+                lexicon: Lexicon
+                    The lexicon to index
+                max_index_distance: int
+                    The maximum number of deletes indexed per word
+        """
+
+        self.max_index_distance = max_index_distance
+        # processed words in trie order and their actual words
+        self.processed_words: List[str] = []
+        self.actual_words: List[List[str]] = []
+        self.deletes: Dict[str, List[int]] = {}
+
+        word_ids = {}
+        for processed_word, actual_word in lexicon.dictionary.iter_entries():
+            word_id = word_ids.get(processed_word)
+            if word_id is None:
+                word_id = word_ids[processed_word] = len(self.processed_words)
+                self.processed_words.append(processed_word)
+                self.actual_words.append([])
+            self.actual_words[word_id].append(actual_word)
+
+        for word_id, processed_word in enumerate(self.processed_words):
+            for delete in generate_deletes(fold_letters(processed_word), max_index_distance):
+                word_list = self.deletes.get(delete)
+                if word_list is None:
+                    self.deletes[delete] = [word_id]
+                else:
+                    word_list.append(word_id)
+
+    def candidates(self, preprocessed_word: str, max_distance: int) -> Set[int]:
+        """
+            Get the ids of the words sharing a delete with the given word
+            Parameters
+            ----------
+                preprocessed_word: str
+                    The preprocessed source word
+                max_distance: int
+                    The maximum number of deletes
+            Returns
+            ----------
+                word_ids: Set[int]
+                    The candidate word ids
+        """
+
+        word_ids = set()
+        for delete in generate_deletes(fold_letters(preprocessed_word), max_distance):
+            word_list = self.deletes.get(delete)
+            if word_list is not None:
+                word_ids.update(word_list)
+
+        return word_ids
+
+    def search(self, preprocessed_word: str, max_distance: int) -> List[tuple]:
+        """
+            Get the words within a weighted edit-distance of the given word
+            Parameters
+            ----------
+                preprocessed_word: str
+                    The preprocessed source word
+                max_distance: int
+                    The maximum distance, at most `max_index_distance`
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The words and their distances in trie order
+        """
+
+        if max_distance > self.max_index_distance:
+            raise ValueError('max_distance ({}) cannot exceed the indexed distance ({})'
+                             .format(max_distance, self.max_index_distance))
+
+        found = []
+        for word_id in self.candidates(preprocessed_word, max_distance):
+            candidate = self.processed_words[word_id]
+            if abs(len(candidate) - len(preprocessed_word)) > max_distance:
+                continue
+            distance = weighted_dynamic_levenshtein(candidate, preprocessed_word, max_distance)
+            if distance <= max_distance:
+                found.append((word_id, distance))
+        found.sort()
+
+        return [(actual_word, distance) for word_id, distance in found for actual_word in self.actual_words[word_id]]
+
+
+class SymSpellCorrector(Base):
+
+    def __init__(self, lexicon: Optional[Lexicon] = None, max_index_distance: int = 2) -> None:
+        """
+            Parameters
+            ----------
+                lexicon: Optional[Lexicon]
+                    The lexicon index to use, defaults to the shared index of the wolof lexicon
+                max_index_distance: int
+                    The maximum number of deletes indexed per word, which bounds `max_distance`
+        """
+
+        super(SymSpellCorrector, self).__init__(lexicon)
+        self.max_index_distance = max_index_distance
+
+    @property
+    def index(self) -> SymSpellIndex:
+        """
+            The symmetric delete index, built once per lexicon and shared by all instances
+        """
+
+        distance = self.max_index_distance
+        return self.lexicon.get_index(('symspell', distance), lambda lexicon: SymSpellIndex(lexicon, distance))
+
+    def get_suggestions(self, word: str, max_distance: int = 2, top_n: Optional[int] = None) -> List[tuple]:
+        """
+            Get suggestions within a weighted edit-distance using the symmetric delete index.
+            Suggestions and their order are the same as the ones of the trie Corrector
+            Parameters
+            ----------
+                word: str
+                    The given source word for suggesting indexed words
+                max_distance: int
+                    The maximum distance between the words indexed and the source word,
+                    at most `max_index_distance`
+                top_n: Optional[int]
+                    Only return the n best suggestions
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The word suggestions with their corresponding distances
+        """
+
+        preprocessed_word = compound_sound_transformation(word_preprocessing(word))
+        suggestions = rank_filter(self.index.search(preprocessed_word, max_distance))
+
+        return suggestions if top_n is None else suggestions[:top_n]
@@ -3,21 +3,109 @@ levenshtein
 -----
 The corrector class for suggesting words based on  weighted levenshtein edit distance
 Contents:
-    Corrector class
+    Corrector class,
+    get_suggestions,
+    get_suggestions_many,
+    _search,
+    _search_automaton,
+    _search_scan,
+    _search_many
 """
 
-from utils.helper import List, word_preprocessing, replace_cost, rank_filter
-from utils.dictionary import Dictionary
+import heapq
+import time
+from typing import Optional
+import numpy as np
+from utils.helper import List, word_preprocessing, replace_cost, substitution_table, rank_filter
 from utils.base import Base
-from utils.wolof_rules import compound_sound_transformation
+from utils.levenshtein_automaton import LevenshteinAutomaton
+from utils.lexicon import Lexicon
+from utils.prefilter import PrefilterIndex, histogram_distance, letter_histogram, letter_mask, popcount
+from utils.search_stats import SearchStats
+from utils.symspell import SymSpellIndex
+from utils.wolof_rules import WOLOF_LETTERS, compound_sound_transformation
+
+LETTER_CODES = {letter: code for code, letter in enumerate(WOLOF_LETTERS)}
+SUBSTITUTION_COSTS = substitution_table(WOLOF_LETTERS)
+ENGINES = ('dp', 'automaton', 'scan', 'symspell')
+# distance indexed by the 'symspell' engine, the searches with a larger radius are run by 'dp'
+SYMSPELL_DISTANCE = 2
+
+
+class _LetterCosts(dict):
+    """
+        Substitution costs of a trie letter against every letter of the searched word,
+        read from SUBSTITUTION_COSTS and computed once per letter and per search
+    """
+
+    def __init__(self, word: str) -> None:
+        super(_LetterCosts, self).__init__()
+        self.word = word
+        self.word_codes = [LETTER_CODES.get(letter) for letter in word]
+
+    def __missing__(self, letter: str) -> List[float]:
+        code = LETTER_CODES.get(letter)
+        if code is None:
+            costs = [replace_cost(letter, target) for target in self.word]
+        else:
+            table_row = SUBSTITUTION_COSTS[code]
+            costs = [replace_cost(letter, target) if target_code is None else table_row[target_code]
+                     for target_code, target in zip(self.word_codes, self.word)]
+        self[letter] = costs
+        return costs
+
+
+class _BatchLetterCosts(dict):
+    """
+        Substitution costs of a trie letter against every letter of a batch of searched words, as a matrix of
+        one row per word padded to the longest word, computed once per letter and per search
+    """
+
+    def __init__(self, words: List[str]) -> None:
+        super(_BatchLetterCosts, self).__init__()
+        self.word_costs = [_LetterCosts(word) for word in words]
+        self.length = max(len(word) for word in words)
+
+    def __missing__(self, letter: str) -> np.ndarray:
+        costs = np.zeros((len(self.word_costs), self.length))
+        for index, word_costs in enumerate(self.word_costs):
+            row = word_costs[letter]
+            costs[index, :len(row)] = row
+        self[letter] = costs
+        return costs
+
+
+def _distance(value: float):
+    # distances of the scalar kernel are ints unless a cost is fractional
+    value = float(value)
+    return int(value) if value.is_integer() else value
 
 
 class Corrector(Base):
 
-    def __init__(self) -> None:
-        super(Corrector, self).__init__()
+    def __init__(self, lexicon: Optional[Lexicon] = None) -> None:
+        super(Corrector, self).__init__(lexicon)
+
+    @property
+    def prefilter_index(self) -> PrefilterIndex:
+        """
+            The length and letter signatures of the lexicon, built once per lexicon and shared by all instances
+        """
+
+        return self.lexicon.get_index('prefilter', PrefilterIndex)
+
+    @property
+    def symspell_index(self) -> SymSpellIndex:
+        """
+            The symmetric delete index of the 'symspell' engine, shared with utils.symspell.SymSpellCorrector
+        """
 
-    def get_suggestions(self, word: str, max_distance: int = 5) -> List[tuple]:
+        return self.lexicon.get_index(('symspell', SYMSPELL_DISTANCE),
+                                      lambda lexicon: SymSpellIndex(lexicon, SYMSPELL_DISTANCE))
+
+    def get_suggestions(self, word: str, max_distance: int = 5, top_n: Optional[int] = None,
+                        stats: Optional[SearchStats] = None, engine: str = 'dp',
+                        prefilter: bool = False) -> List[tuple]:
         """
             Get suggestions based on the edit-distance using the under dynamic programming approach
             Parameters
@@ -26,48 +114,447 @@ class Corrector(Base):
                     The given source word for suggesting indexed words
                 max_distance: int
                     The maximum distance between the words indexed and the source word
+                top_n: Optional[int]
+                    Only return the n best suggestions, i.e. the first n suggestions of the complete ranking.
+                    The trie is searched with an increasing radius (1, 2, ... max_distance) until n words are
+                    found, keeping only the n best candidates in a bounded heap
+                stats: Optional[SearchStats]
+                    Incremented with the counters and the wall time of the search
+                engine: str
+                    'dp' computes a row of the dynamic-programming table at each trie node, 'automaton' walks
+                    the trie with a weighted Levenshtein automaton of the word, faster for small distances,
+                    'scan' computes the distance of the lexicon words of a close length which pass the
+                    prefilters, 'symspell' looks the deletes of the word up in a symmetric delete index (see
+                    utils.symspell) for a radius up to SYMSPELL_DISTANCE and falls back to 'dp' beyond.
+                    All the engines return the same suggestions
+                prefilter: bool
+                    Skip the trie nodes whose words all differ in length or letters too much from the word
+                    (see utils.prefilter). It pays off for the 'dp' engine with a small max_distance only, as
+                    the check slows down every visit. 'scan' always prefilters
             Returns
             ----------
                 suggestions: List[tuple]
                     The word suggestions with their corresponding distances
         """
 
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine {!r}, expected one of {}'.format(engine, ', '.join(ENGINES)))
+
+        if stats is None:
+            return self._get_suggestions(word, max_distance, top_n, engine=engine, prefilter=prefilter)
+
+        start = time.perf_counter()
+        suggestions = self._get_suggestions(word, max_distance, top_n, stats, engine, prefilter)
+        stats.queries += 1
+        stats.elapsed += time.perf_counter() - start
+        return suggestions
+
+    def _get_suggestions(self, word: str, max_distance: int, top_n: Optional[int],
+                         stats: Optional[SearchStats] = None, engine: str = 'dp',
+                         prefilter: bool = False) -> List[tuple]:
         preprocessed_word = compound_sound_transformation(word_preprocessing(word))
+        prefilter_index = self.prefilter_index if prefilter or engine == 'scan' else None
+
+        def search(radius: float, n_best: Optional[int] = None) -> List[tuple]:
+            if engine == 'automaton':
+                return self._search_automaton(preprocessed_word, radius, stats, prefilter_index)
+            if engine == 'scan':
+                return self._search_scan(preprocessed_word, radius, prefilter_index, stats)
+            if engine == 'symspell' and radius <= SYMSPELL_DISTANCE:
+                # every edit costs a whole number, so a fractional radius finds the same words as its integer part
+                return self.symspell_index.search(preprocessed_word, int(radius))
+            return self._search(preprocessed_word, radius, n_best, stats, prefilter_index)
+
+        if top_n is None:
+            return rank_filter(search(max_distance))
+
+        if top_n <= 0:
+            return []
+
+        radius = min(1, max_distance)
+        while True:
+            if engine == 'dp':
+                suggestions = search(radius, top_n)
+            else:
+                suggestions = rank_filter(search(radius))[:top_n]
+            if len(suggestions) >= top_n or radius >= max_distance:
+                return suggestions
+            radius = min(radius + 1, max_distance)
+
+    def _search_scan(self, preprocessed_word: str, max_distance: float, prefilter: PrefilterIndex,
+                     stats: Optional[SearchStats] = None) -> List[tuple]:
+        """
+            Compute the distance of the lexicon words whose length differs by at most max_distance from the
+            given word and which pass the letter bitmask and histogram bounds
+            Parameters
+            ----------
+                preprocessed_word: str
+                    The preprocessed source word
+                max_distance: float
+                    The maximum distance between the words indexed and the source word
+                prefilter: PrefilterIndex
+                    The words of the lexicon by length and their signatures
+                stats: Optional[SearchStats]
+                    Incremented with the counters of the scan, each scanned word counting as a visited node
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The words and their distances in trie order
+        """
+
+        columns = len(preprocessed_word) + 1
+        letter_costs = _LetterCosts(preprocessed_word)
+        query_mask = letter_mask(preprocessed_word)
+        query_histogram = letter_histogram(preprocessed_word)
+        masks = prefilter.masks
+        histograms = prefilter.histograms
+        processed_words = prefilter.processed_words
+        first_row = list(range(columns))
+        found = []
+        scanned = mask_pruned = histogram_pruned = dp_cells = 0
+
+        for length in range(max(0, columns - 1 - int(max_distance)), columns + int(max_distance)):
+            for word_id in prefilter.buckets.get(length, ()):
+                scanned += 1
+                different_letters = query_mask ^ masks[word_id]
+                if different_letters and popcount(different_letters) > max_distance:
+                    mask_pruned += 1
+                    continue
+                if histogram_distance(query_histogram, histograms[word_id]) > max_distance:
+                    histogram_pruned += 1
+                    continue
+
+                # the rows of _search along the path of the word, stopped once every cell exceeds the bound
+                previous_row = first_row
+                for letter in processed_words[word_id]:
+                    costs = letter_costs[letter]
+                    value = row_min = previous_row[0] + 1
+                    current_row = [value]
+                    for i in range(1, columns):
+                        substitution = previous_row[i - 1] + costs[i - 1]
+                        deletion = previous_row[i] + 1
+                        insertion = value + 1
+                        value = substitution if substitution < deletion else deletion
+                        if insertion < value:
+                            value = insertion
+                        current_row.append(value)
+                        if value < row_min:
+                            row_min = value
+                    dp_cells += columns
+                    if row_min > max_distance:
+                        break
+                    previous_row = current_row
+                else:
+                    if previous_row[-1] <= max_distance:
+                        found.append((word_id, previous_row[-1]))
+
+        # word ids are trie ranks: sorting them gives the trie order of the other engines
+        found.sort()
+        suggestions = [(actual_word, distance) for word_id, distance in found
+                       for actual_word in prefilter.actual_words[word_id]]
+
+        if stats is not None:
+            length_pruned = len(processed_words) - scanned
+            stats.add_search(scanned, dp_cells, 0, len(suggestions), length_pruned, mask_pruned, histogram_pruned)
+
+        return suggestions
+
+    def get_suggestions_many(self, words: List[str], max_distance: int = 5,
+                             top_n: Optional[int] = None) -> List[List[tuple]]:
+        """
+            Get the suggestions of a batch of words, walking the trie once for all of them. At each trie node the
+            dynamic-programming rows of all the words still within reach are computed together with NumPy, which
+            pays off from a few dozen words on
+            Parameters
+            ----------
+                words: List[str]
+                    The given source words for suggesting indexed words
+                max_distance: int
+                    The maximum distance between the words indexed and the source words
+                top_n: Optional[int]
+                    Only return the n best suggestions of each word, the words without n suggestions are searched
+                    again with a larger radius (1, 2, ... max_distance)
+            Returns
+            ----------
+                suggestions: List[List[tuple]]
+                    The suggestions of each word, the same as get_suggestions(word, max_distance, top_n)
+        """
+
+        preprocessed_words = [compound_sound_transformation(word_preprocessing(word)) for word in words]
+        # each distinct word is searched once
+        queries = list(dict.fromkeys(preprocessed_words))
+
+        if top_n is None:
+            found = dict(zip(queries, self._search_many(queries, max_distance)))
+            return [rank_filter(found[word]) for word in preprocessed_words]
+
+        if top_n <= 0:
+            return [[] for _ in words]
+
+        found = {}
+        radius = min(1, max_distance)
+        while queries:
+            pending = []
+            for word, suggestions in zip(queries, self._search_many(queries, radius)):
+                if len(suggestions) >= top_n or radius >= max_distance:
+                    found[word] = rank_filter(suggestions)[:top_n]
+                else:
+                    pending.append(word)
+            queries = pending
+            radius = min(radius + 1, max_distance)
 
-        def search(dictionary_node: Dictionary, previous_row: list):
-            """
-                Search for the candidates in the given dictionary node's children
+        return [found[word] for word in preprocessed_words]
+
+    def _search_automaton(self, preprocessed_word: str, max_distance: float, stats: Optional[SearchStats] = None,
+                          prefilter: Optional[PrefilterIndex] = None) -> List[tuple]:
+        """
+            Intersect the trie with the weighted Levenshtein automaton of the given word
             Parameters
             ----------
-                dictionary_node: Dictionary
-                    The node in the Trie dictionary
-                previous_row: list
-                    The previous row in the dynamic-programming approach
-            """
+                preprocessed_word: str
+                    The preprocessed source word
+                max_distance: float
+                    The maximum distance between the words indexed and the source word
+                stats: Optional[SearchStats]
+                    Incremented with the counters of the walk, the DP cells being those of the automaton states
+                prefilter: Optional[PrefilterIndex]
+                    Skip the trie nodes whose words are all too long, too short or miss too many letters
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The words and their distances in trie order
+        """
+
+        dictionary = self.dictionary
+        edges = dictionary.edges
+        words_at = dictionary.words
+        automaton = LevenshteinAutomaton(preprocessed_word, max_distance, _LetterCosts(preprocessed_word))
+        transitions = automaton.transitions
+        distances = automaton.distances
+        live = automaton.live
+        suggestions = []
+        nodes_visited = 0
+        pruned_subtrees = 0
+        count_pruned = stats is not None
+        node_bounds = prefilter.node_bounds if prefilter is not None else None
+        length = len(preprocessed_word)
+        query_mask = letter_mask(preprocessed_word)
+        length_pruned = mask_pruned = 0
+
+        # same depth-first order as _search, each trie node carrying the automaton state of its parent
+        stack = [(child_node, letter, automaton.start) for letter, child_node in reversed(edges(dictionary.root))]
+        while stack:
+            node, current_source_letter, state = stack.pop()
+            nodes_visited += 1
+
+            if node_bounds is not None:
+                low, high, mask = node_bounds[node]
+                if low - length > max_distance or length - high > max_distance:
+                    length_pruned += 1
+                    continue
+                missing_letters = query_mask & ~mask
+                if missing_letters and popcount(missing_letters) > max_distance:
+                    mask_pruned += 1
+                    continue
+
+            next_state = transitions[state].get(current_source_letter)
+            if next_state is None:
+                next_state = automaton.add_transition(state, current_source_letter)
 
-            for current_source_letter in dictionary_node.children:
-                current_row = [previous_row[0] + 1]
+            distance = distances[next_state]
+            if distance is not None:
+                node_words = words_at(node)
+                if node_words is not None:
+                    for words in node_words:
+                        suggestions.append((words, distance))
 
-                for i in range(1, len(preprocessed_word) + 1):
-                    value = min(previous_row[i] + 1, current_row[i - 1] + 1, previous_row[i - 1] +
-                                replace_cost(current_source_letter, preprocessed_word[i - 1]))
-                    current_row.append(value)
+            if live[next_state]:
+                stack.extend((child_node, letter, next_state) for letter, child_node in reversed(edges(node)))
+            elif count_pruned:
+                pruned_subtrees += len(edges(node))
 
-                if (current_row[-1] <= max_distance and
-                        dictionary_node.children[current_source_letter].words_at_node is not None):
+        if stats is not None:
+            transitions_computed = sum(len(state_transitions) for state_transitions in transitions)
+            stats.add_search(nodes_visited, transitions_computed * (len(preprocessed_word) + 1), pruned_subtrees,
+                             len(suggestions), length_pruned, mask_pruned)
 
-                    for words in dictionary_node.children[current_source_letter].words_at_node:
-                        # noinspection PyTypeChecker
-                        suggestions.append((words, current_row[-1]))
+        return suggestions
 
-                if min(current_row) <= max_distance:
-                    search(dictionary_node.children[current_source_letter], current_row)
+    def _search_many(self, preprocessed_words: List[str], max_distance: float) -> List[List[tuple]]:
+        """
+            Walk the trie once and compute the weighted edit distance of every indexed word to each given word.
+            The rows of the words are padded to the longest word, the padding never changes the cells before it
+            and is excluded from the row minimums
+            Parameters
+            ----------
+                preprocessed_words: List[str]
+                    The preprocessed source words
+                max_distance: float
+                    The maximum distance between the words indexed and the source words
+            Returns
+            ----------
+                suggestions: List[List[tuple]]
+                    The words within max_distance of each source word and their distances, in trie order
+        """
 
+        if not preprocessed_words:
+            return []
+
+        dictionary = self.dictionary
+        edges = dictionary.edges
+        words_at = dictionary.words
+        letter_costs = _BatchLetterCosts(preprocessed_words)
+        lengths = np.array([len(word) for word in preprocessed_words])
+        positions = np.arange(letter_costs.length + 1, dtype=float)
+        padding = np.where(positions[None, :] <= lengths[:, None], 0.0, np.inf)
+        suggestions = [[] for _ in preprocessed_words]
+
+        # each trie node is visited with the indexes of the words still within reach and their rows at its parent
+        everyone = np.arange(len(preprocessed_words))
+        first_rows = np.tile(positions, (len(preprocessed_words), 1))
+        stack = [(child_node, letter, everyone, first_rows) for letter, child_node in reversed(edges(dictionary.root))]
+        while stack:
+            node, current_source_letter, active, previous_rows = stack.pop()
+
+            costs = letter_costs[current_source_letter]
+            if len(active) < len(everyone):
+                costs = costs[active]
+            rows = np.empty_like(previous_rows)
+            rows[:, 0] = previous_rows[:, 0] + 1
+            np.minimum(previous_rows[:, :-1] + costs, previous_rows[:, 1:] + 1, out=rows[:, 1:])
+            # insertions: rows[i] = min over j <= i of (rows[j] + i - j), a running minimum of rows[j] - j
+            rows -= positions
+            np.minimum.accumulate(rows, axis=1, out=rows)
+            rows += positions
+
+            node_words = words_at(node)
+            if node_words is not None:
+                values = rows[np.arange(len(active)), lengths[active]]
+                for index in np.flatnonzero(values <= max_distance):
+                    distance = _distance(values[index])
+                    word_suggestions = suggestions[active[index]]
+                    for words in node_words:
+                        word_suggestions.append((words, distance))
+
+            children = edges(node)
+            if not children:
+                continue
+            within_reach = (rows + padding[active]).min(axis=1) <= max_distance
+            if not within_reach.all():
+                if not within_reach.any():
+                    continue
+                active, rows = active[within_reach], rows[within_reach]
+            stack.extend((child_node, letter, active, rows) for letter, child_node in reversed(children))
+
+        return suggestions
+
+    def _search(self, preprocessed_word: str, max_distance: float, top_n: Optional[int] = None,
+                stats: Optional[SearchStats] = None, prefilter: Optional[PrefilterIndex] = None) -> List[tuple]:
+        """
+            Walk the trie and compute the weighted edit distance of every indexed word to the given word
+            Parameters
+            ----------
+                preprocessed_word: str
+                    The preprocessed source word
+                max_distance: float
+                    The maximum distance between the words indexed and the source word
+                top_n: Optional[int]
+                    Keep only the n best candidates, in that case the search bound shrinks to the distance
+                    of the worst kept candidate as soon as n candidates are found
+                stats: Optional[SearchStats]
+                    Incremented with the counters of the walk
+                prefilter: Optional[PrefilterIndex]
+                    Skip the trie nodes whose words are all too long, too short or miss too many letters
+            Returns
+            ----------
+                suggestions: List[tuple]
+                    The words and their distances in trie order when top_n is None,
+                    otherwise the n best words sorted by distance then trie order
+        """
+
+        dictionary = self.dictionary
+        edges = dictionary.edges
+        words_at = dictionary.words
+        columns = len(preprocessed_word) + 1
+        letter_costs = _LetterCosts(preprocessed_word)
+
+        # one reusable row buffer per trie depth, rows[0] is the first row of the dynamic-programming table
+        rows = [list(range(columns))]
         suggestions = []
+        # bounded max-heap of the n best candidates keyed by (-distance, -rank in trie order)
+        best = []
+        rank = 0
+        # local counters, only the pruned subtrees need extra work which is skipped without stats
+        nodes_visited = 0
+        pruned_subtrees = 0
+        count_pruned = stats is not None
+        node_bounds = prefilter.node_bounds if prefilter is not None else None
+        length = len(preprocessed_word)
+        query_mask = letter_mask(preprocessed_word)
+        length_pruned = mask_pruned = 0
+
+        # depth-first walk of the trie, children are pushed in reverse order to be visited in insertion order
+        stack = [(child_node, letter, 1) for letter, child_node in reversed(edges(dictionary.root))]
+        while stack:
+            node, current_source_letter, depth = stack.pop()
+            nodes_visited += 1
+
+            if node_bounds is not None:
+                low, high, mask = node_bounds[node]
+                if low - length > max_distance or length - high > max_distance:
+                    length_pruned += 1
+                    continue
+                missing_letters = query_mask & ~mask
+                if missing_letters and popcount(missing_letters) > max_distance:
+                    mask_pruned += 1
+                    continue
+
+            if depth == len(rows):
+                rows.append([0] * columns)
+            previous_row = rows[depth - 1]
+            current_row = rows[depth]
+            costs = letter_costs[current_source_letter]
+
+            value = row_min = current_row[0] = previous_row[0] + 1
+            for i in range(1, columns):
+                substitution = previous_row[i - 1] + costs[i - 1]
+                deletion = previous_row[i] + 1
+                insertion = value + 1
+                value = substitution if substitution < deletion else deletion
+                if insertion < value:
+                    value = insertion
+                current_row[i] = value
+                if value < row_min:
+                    row_min = value
+
+            if value <= max_distance:
+                node_words = words_at(node)
+                if node_words is not None:
+                    if top_n is None:
+                        for words in node_words:
+                            suggestions.append((words, value))
+                    else:
+                        for words in node_words:
+                            rank += 1
+                            candidate = (-value, -rank, words)
+                            if len(best) < top_n:
+                                heapq.heappush(best, candidate)
+                            elif candidate > best[0]:
+                                heapq.heapreplace(best, candidate)
+                        if len(best) == top_n:
+                            max_distance = -best[0][0]
+
+            if row_min <= max_distance:
+                stack.extend((child_node, letter, depth + 1) for letter, child_node in reversed(edges(node)))
+            elif count_pruned:
+                pruned_subtrees += len(edges(node))
 
-        first_row = range(0, len(preprocessed_word) + 1)
+        if stats is not None:
+            rows_computed = nodes_visited - length_pruned - mask_pruned
+            stats.add_search(nodes_visited, rows_computed * columns, pruned_subtrees,
+                             len(suggestions) if top_n is None else rank, length_pruned, mask_pruned)
 
-        # noinspection PyTypeChecker
-        search(self.dictionary, first_row)
+        if top_n is not None:
+            return [(words, -distance) for distance, _, words in sorted(best, reverse=True)]
 
-        return rank_filter(suggestions)
+        return suggestions
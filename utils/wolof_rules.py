@@ -4,11 +4,17 @@ wolof_rules
 Functions used to verify wolof word in accordance to the writing rules established.
 Contents:
     compound_sound_transformation,
-    rules_validator
+    rules_validator,
+    validate_many
 """
 
 import re
+from functools import lru_cache
+from typing import Iterable, List, Set
+from utils.rewriter import SequentialRewriter
 
+WOLOF_LETTERS = 'aàãbcdeéëfgijklmnñŋoópqrstuwxy'
+WOLOF_VOWELS = 'aàãioóueéë'
 weak_wolof_consonants = {'p', 't', 'c', 'k', 'q', 'b', 'd', 'j', 'g', 'm', 'n', 'ñ', 'ŋ', 'f', 'r',
                          's', 'x', 'w', 'l', 'y'}
 gemine_wolof_letters = {'pp', 'tt', 'cc', 'kk', 'bb', 'dd', 'jj', 'gg', 'ŋŋ', 'ww', 'll',
@@ -20,11 +26,28 @@ long_wolof_vowels = {'ii', 'uu', 'éé', 'óó', 'ee', 'aa'}
 wolof_vowels = short_wolof_vowels | long_wolof_vowels
 
 
+fr_wol_maps = {'ouille': 'uy', 'aille': 'ay', 'eille': 'ey', 'ienne': 'iyen', 'tion': 'siyoŋ', 'ouss': 'us',
+               'tchi': 'c', 'tch': 'c', 'thi': 'c', 'cie': 'si', 'oeu': 'ë', 'eau': 'óo', 'gui': 'gi', 'guo': 'go',
+               'gua': 'ga', 'gue': 'ge', 'gué': 'gé', 'guè': 'gee', 'diu': 'ju', 'dio': 'jo', 'dia': 'ja',
+               'die': 'je', 'ein': 'en', 'dj': 'j', 'niu': 'ñu', 'nio': 'ño', 'nia': 'ña', 'nie': 'ñe',
+               'que': 'k', 'oix': 'uwaa', 'iou': 'iwu', 'ier': 'iye', 'kh': 'x', 'gn': 'ñ', 'th': 'c', 'ou': 'u',
+               'ch': 's', 'ck': 'k', 'eu': 'ë', 'ei': 'ee', 'au': 'ó', 'oi': 'uwaa', 'ao': 'aw',
+               'ph': 'f', 'ui': 'uwii', 'ss': 's', 'è': 'ee', 'v': 'w', 'z': 's', 'h': ''}
+
+# the substitutions of fr_wol_maps, applied in order, compiled into a single-pass transducer
+fr_wol_rewriter = SequentialRewriter(list(fr_wol_maps.items()))
+ie_ending_pattern = re.compile('ie$')
+e_ending_pattern = re.compile('é$')
+SOUND_TRANSFORMATION_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=SOUND_TRANSFORMATION_CACHE_SIZE)
 def compound_sound_transformation(word: str) -> str:
     """
         Modifies writing of a word according to wolof writing rules.
         Deletes compound sounds like ou, oi, ch, an, en, eu, au, eau, ien, ienne, ai, gn, elle, ette, tion, oin
         ui, eil, eille, ouille, ail, aille, ueil, ier, ei, oeu, kh, gn, di, tch, ouss
+        Results are memoized in a bounded LRU cache
         Parameters
         ----------
             word: str
@@ -34,29 +57,33 @@ def compound_sound_transformation(word: str) -> str:
             word: str
                 new word written in wolof by taking into account wolof rules
     """
-    fr_wol_maps = {'ouille': 'uy', 'aille': 'ay', 'eille': 'ey', 'ienne': 'iyen', 'tion': 'siyoŋ', 'ouss': 'us',
-                   'tchi': 'c', 'tch': 'c', 'thi': 'c', 'cie': 'si', 'oeu': 'ë', 'eau': 'óo', 'gui': 'gi', 'guo': 'go',
-                   'gua': 'ga', 'gue': 'ge', 'gué': 'gé', 'guè': 'gee', 'diu': 'ju', 'dio': 'jo', 'dia': 'ja',
-                   'die': 'je', 'ein': 'en', 'dj': 'j', 'niu': 'ñu', 'nio': 'ño', 'nia': 'ña', 'nie': 'ñe',
-                   'que': 'k', 'oix': 'uwaa', 'iou': 'iwu', 'ier': 'iye', 'kh': 'x', 'gn': 'ñ', 'th': 'c', 'ou': 'u',
-                   'ch': 's', 'ck': 'k', 'eu': 'ë', 'ei': 'ee', 'au': 'ó', 'oi': 'uwaa', 'ao': 'aw',
-                   'ph': 'f', 'ui': 'uwii', 'ss': 's', 'è': 'ee', 'v': 'w', 'z': 's', 'h': ''}
 
     # if word do not end with cie replace ending ie by i
     if not word.endswith('cie'):
-        word = re.sub('ie$', 'i', word)
+        word = ie_ending_pattern.sub('i', word)
+
+    word = e_ending_pattern.sub('e', word)
+
+    return fr_wol_rewriter.rewrite(word)
+
 
-    word = re.sub('é$', 'e', word)
+def _alternation(strings: Set[str]) -> str:
+    return '(?:' + '|'.join(re.escape(string) for string in sorted(strings)) + ')'
 
-    for k, v in fr_wol_maps.items():
-        word = re.sub(k, v, word)
 
-    return word
+# a word breaks the writing rules if it starts with a geminate consonant, contains a long vowel followed by a
+# strong consonant or ends with a geminate consonant followed by a long vowel
+rules_pattern = re.compile('^' + _alternation(gemine_wolof_letters) + '|' +
+                           _alternation(long_wolof_vowels) + _alternation(strong_wolof_consonants) + '|' +
+                           _alternation(gemine_wolof_letters) + _alternation(long_wolof_vowels) + r'\Z')
 
 
 def rules_validator(word: str) -> bool:
     """
-    Check if a given string respects several wolof writing rules
+    Check if a given string respects several wolof writing rules:
+        word cannot end with long consonants and long vowels at same time,
+        strong consonant never follow long vowel,
+        strong consonant never start word except prenasalized letter
     Parameters
     ----------
         word: str
@@ -67,21 +94,21 @@ def rules_validator(word: str) -> bool:
             boolean which is True if the given word respects wolof writing rules
     """
 
-    # word cannot end with long consonants and long vowels at same time
-    for gl in gemine_wolof_letters:
-        for lv in long_wolof_vowels:
-            if word.endswith(gl+lv):
-                return False
+    return rules_pattern.search(word) is None
 
-    # strong consonant never follow long vowel
-    for sc in strong_wolof_consonants:
-        for lv in long_wolof_vowels:
-            if lv+sc in word:
-                return False
 
-    # strong consonant never start word except prenasalized letter
-    for gl in gemine_wolof_letters:
-        if word.startswith(gl):
-            return False
+def validate_many(words: Iterable[str]) -> List[bool]:
+    """
+    Check if each of the given strings respects the wolof writing rules
+    Parameters
+    ----------
+        words: Iterable[str]
+            words which we want to check
+    Returns
+    ----------
+        correct_words: List[bool]
+            booleans which are True for the words respecting wolof writing rules
+    """
 
-    return True
+    search = rules_pattern.search
+    return [search(word) is None for word in words]